@@ -1,51 +1,174 @@
-from rich.logging import RichHandler
-from rich.text import Text
-import logging
-import os
 """
 这是一个 Python 脚本，用于设置日志输出。
-上次编辑时间：2025年7月20日
+导入本模块没有任何副作用：不创建目录、不打开文件、不导入 Rich，
+调用 configure()（或 set_* / setup_logging()）时才创建处理器。
+
+    from lib.log import logging, configure
+    configure(path='./log/app.log', console_level=logging.INFO, file_level=logging.DEBUG)
+
+上次编辑时间：2026年10月19日
 作者：Sakurakugu
 """
 
-class CustomRichHandler(RichHandler):
-    LEVEL_NAME_MAP = {
-        "CRITICAL": "[致命]",
-        "ERROR": "[错误]",
-        "WARNING": "[警告]",
-        "INFO": "[信息]",
-        "DEBUG": "[调试]",
-        "NOTSET": "[未设置]",
-    }
-    
-    LEVEL_COLOR_MAP = {
-        "CRITICAL": "bold red",
-        "ERROR": "red",
-        "WARNING": "yellow",
-        "INFO": "green",
-        "DEBUG": "blue",
-        "NOTSET": "dim",
-    }
-
-    def get_level_text(self, record):
-        level_name = self.LEVEL_NAME_MAP.get(record.levelname, record.levelname)
-        color = self.LEVEL_COLOR_MAP.get(record.levelname, "white")
-        return Text(level_name, style=color)
+import logging
+import atexit
+import functools
+import math
+import threading
+import time
+import os
 
 # 全局变量存储日志文件名和目录
 _log_path = './log/app.log'
 _console_level = logging.DEBUG
 _file_level = logging.DEBUG
+# 异步模式：根日志器只挂 QueueHandler，由后台线程中的 QueueListener 输出到控制台和文件
+_async_enabled = False
+_queue_size = 10000
+_overflow_policy = "block"
+_listener = None
+_queue_handler = None
+
+OVERFLOW_POLICIES = ("block", "drop_new", "drop_old")
+# 日志轮转：按大小和/或时间轮转，0 和 None 表示不按该条件轮转
+_max_bytes = 0
+_rotate_when = None
+_rotate_interval = 1
+_backup_count = 5
+_compress = True
+# 文件日志格式：text（人读的文本）或 json（每行一个 JSON 对象）
+_file_format = "text"
+
+LOG_FORMATS = ("text", "json")
+# 重复日志合并：同一模板先输出 first 条，之后每个模板每秒最多 rate 条，其余每 interval 秒汇总一次
+_aggregate_enabled = False
+_aggregate_first = 20
+_aggregate_interval = 5.0
+_aggregate_rate = 0
+_aggregate_file_full_detail = False
+_aggregation_filters = []
+# 多进程模式：进程池中的工作进程把日志放入 multiprocessing 队列，由主进程中的一个线程交给主进程的处理器写入
+_multiprocess_enabled = False
+_mp_start_method = None
+_mp_queue = None
+_mp_listener = None
+
+def __getattr__(name):
+    # 兼容以前直接从本模块导入处理器类的写法，用到时才导入 lib/log_handlers.py
+    if name in ("CustomRichHandler", "JsonLinesFormatter", "BoundedQueueHandler", "CompressingRotatingFileHandler",
+                "RepeatAggregationFilter", "WorkerQueueHandler"):
+        from lib import log_handlers
+        return getattr(log_handlers, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _update_path(path):
+    global _log_path
+    _log_path = path
+
+def _update_level(console_level, file_level):
+    global _console_level, _file_level
+    if console_level is not None:
+        _console_level = console_level
+    if file_level is not None:
+        _file_level = file_level
+
+def _update_rotation(max_bytes, when, interval, backup_count, compress):
+    global _max_bytes, _rotate_when, _rotate_interval, _backup_count, _compress
+    if max_bytes is not None:
+        _max_bytes = max_bytes
+    if when is not None:
+        _rotate_when = None if when.lower() == "none" else when
+    if interval is not None:
+        _rotate_interval = interval
+    if backup_count is not None:
+        _backup_count = backup_count
+    if compress is not None:
+        _compress = compress
+
+def _update_format(file_format):
+    global _file_format
+    if file_format not in LOG_FORMATS:
+        raise ValueError(f"未知的日志格式：{file_format}，可选值为 {', '.join(LOG_FORMATS)}")
+    _file_format = file_format
+
+def _update_async(enabled, queue_size, overflow_policy):
+    global _async_enabled, _queue_size, _overflow_policy
+    if overflow_policy is not None and overflow_policy not in OVERFLOW_POLICIES:
+        raise ValueError(f"未知的溢出策略：{overflow_policy}，可选值为 {', '.join(OVERFLOW_POLICIES)}")
+    if enabled is not None:
+        _async_enabled = enabled
+    if queue_size is not None:
+        _queue_size = queue_size
+    if overflow_policy is not None:
+        _overflow_policy = overflow_policy
+
+def _update_multiprocess(enabled):
+    global _multiprocess_enabled, _mp_start_method, _mp_queue
+    if enabled is None:
+        return
+    start_method = enabled if isinstance(enabled, str) else None
+    if start_method is not None:
+        import multiprocessing
+        if start_method not in multiprocessing.get_all_start_methods():
+            raise ValueError(f"不支持的进程启动方式：{start_method}，可选值为 {', '.join(multiprocessing.get_all_start_methods())}")
+    if start_method != _mp_start_method:
+        # 队列只能传给同一启动方式的进程，启动方式改变时重新创建
+        _mp_queue = None
+    _multiprocess_enabled = bool(enabled)
+    _mp_start_method = start_method
+
+def _update_aggregation(enabled, first, interval, rate, file_full_detail):
+    global _aggregate_enabled, _aggregate_first, _aggregate_interval, _aggregate_rate, _aggregate_file_full_detail
+    if enabled is not None:
+        _aggregate_enabled = enabled
+    if first is not None:
+        _aggregate_first = first
+    if interval is not None:
+        _aggregate_interval = interval
+    if rate is not None:
+        _aggregate_rate = rate
+    if file_full_detail is not None:
+        _aggregate_file_full_detail = file_full_detail
+
+def configure(path=None, console_level=None, file_level=None, *, file_format=None,
+              max_bytes=None, when=None, interval=None, backup_count=None, compress=None,
+              async_mode=None, queue_size=None, overflow_policy=None,
+              aggregate=None, aggregate_first=None, aggregate_interval=None, aggregate_rate=None,
+              aggregate_file_full_detail=None, multiprocess=None, metrics=None, trace_path=None):
+    """
+    一次性设置日志，只创建一次处理器（推荐使用，代替依次调用多个 set_* 函数）
+    - path: 日志文件路径（默认 './log/app.log'，目录不存在时自动创建）
+    - console_level / file_level: 控制台和文件的日志级别（默认均为 DEBUG）
+    - file_format: 文件日志格式，见 set_log_format
+    - max_bytes / when / interval / backup_count / compress: 日志轮转，见 set_log_rotation
+    - async_mode / queue_size / overflow_policy: 异步日志，见 set_async_mode
+    - aggregate / aggregate_first / aggregate_interval / aggregate_rate / aggregate_file_full_detail:
+      重复日志合并，见 set_log_aggregation
+    - multiprocess: 接收进程池工作进程的日志，见 set_multiprocess_mode
+    - metrics / trace_path: 计时区间和计数器统计，见 enable_metrics
+    未指定的参数保持当前值。
+    """
+    if path is not None:
+        _update_path(path)
+    _update_level(console_level, file_level)
+    if file_format is not None:
+        _update_format(file_format)
+    _update_rotation(max_bytes, when, interval, backup_count, compress)
+    _update_async(async_mode, queue_size, overflow_policy)
+    _update_aggregation(aggregate, aggregate_first, aggregate_interval, aggregate_rate, aggregate_file_full_detail)
+    _update_multiprocess(multiprocess)
+    if metrics is not None:
+        enable_metrics(metrics, trace_path)
+    setup_logging()
 
 def set_log_path(path):
     """
     设置日志路径，默认路径为 './log/app.log'。
     如果目录不存在，将自动创建。
     """
-    global _log_path
-    _log_path = path
+    _update_path(path)
     setup_logging()
-    
+
 def set_log_level(console_level, file_level=None):
     """
     设置日志级别
@@ -53,49 +176,499 @@ def set_log_level(console_level, file_level=None):
     - file_level: 文件日志级别（可选，如果不设置则使用 console_level）
     有效值为：DEBUG, INFO, WARNING, ERROR, CRITICAL
     """
-    global _console_level, _file_level
-    _console_level = console_level
-    if file_level is not None:
-        _file_level = file_level
+    _update_level(console_level, file_level)
+    setup_logging()
+
+def set_log_rotation(max_bytes=None, when=None, interval=None, backup_count=None, compress=None):
+    """
+    设置日志轮转（默认不轮转）
+    - max_bytes: 日志文件超过该字节数时轮转（可选，0 表示不按大小轮转）
+    - when: 按时间轮转的单位（可选）：S、M、H、D 或 midnight，"none" 表示不按时间轮转
+    - interval: 按时间轮转的间隔（可选，默认 1 个单位）
+    - backup_count: 保留的旧日志数量（可选，默认 5，0 表示全部保留）
+    - compress: 是否在后台线程中用 gzip 压缩旧日志（可选，默认压缩）
+    """
+    _update_rotation(max_bytes, when, interval, backup_count, compress)
+    setup_logging()
+
+def set_log_format(file_format):
+    """
+    设置文件日志格式
+    - file_format: text（默认，`时间 - 级别 - 行号 - 消息`）或 json（每行一个 JSON 对象，可用 lib/log_reader.py 按字段过滤）
+    使用 json 时，通过 `logging.info("...", extra={"字段": 值})` 传入的字段会作为单独的键输出。
+    """
+    _update_format(file_format)
     setup_logging()
 
+def set_async_mode(enabled=True, queue_size=None, overflow_policy=None):
+    """
+    设置异步日志模式（默认关闭）
+    - enabled: 开启后调用 logging 只是把日志放入队列，由后台线程负责格式化和写入
+    - queue_size: 队列最大长度（可选，默认 10000）
+    - overflow_policy: 队列满时的策略（可选）：block（默认，等待）、drop_new（丢弃新日志）、drop_old（丢弃最早的日志）
+    程序退出时会自动输出队列中剩余的日志。
+    """
+    _update_async(enabled, queue_size, overflow_policy)
+    setup_logging()
+
+def set_log_aggregation(enabled=True, first=None, interval=None, rate=None, file_full_detail=None):
+    """
+    设置重复日志合并（默认关闭），用于移动上千个项目时只输出少量可读的日志
+    - enabled: 开启后按日志器和消息模板合并信息及以下级别的重复日志，警告和错误不合并
+    - first: 每个模板先完整输出的条数（可选，默认 20）
+    - interval: 输出 "……还有 N 条类似日志" 汇总的间隔秒数（可选，默认 5）
+    - rate: 超过 first 条后每个模板每秒最多再输出的条数（可选，默认 0，即只输出汇总）
+    - file_full_detail: 文件日志是否保留全部日志、只合并控制台（可选，默认文件也合并）
+    """
+    _update_aggregation(enabled, first, interval, rate, file_full_detail)
+    setup_logging()
+
+def set_multiprocess_mode(enabled=True):
+    """
+    设置多进程日志模式（默认关闭），用于进程池中的工作进程
+    - enabled: 开启后主进程创建一个 multiprocessing 队列和一个接收线程，
+      工作进程的日志经队列交给主进程的处理器，只有主进程写日志文件，不会出现多个进程同时写同一文件；
+      进程池指定了 mp_context 时传入相同的启动方式名称（fork、spawn、forkserver），否则传 True 使用默认启动方式
+    工作进程需要在创建进程池时用 get_worker_initializer() 初始化：
+        initializer, initargs = get_worker_initializer()
+        with ProcessPoolExecutor(initializer=initializer, initargs=initargs) as executor: ...
+    """
+    _update_multiprocess(enabled)
+    setup_logging()
+
+def get_worker_initializer():
+    """
+    返回进程池的 (initializer, initargs)，工作进程的日志级别与当前控制台和文件日志级别中较低的一个相同
+    """
+    if _mp_queue is None:
+        raise RuntimeError("未开启多进程日志模式，请先调用 set_multiprocess_mode() 或 configure(multiprocess=True)")
+    return worker_initializer, (_mp_queue, min(_console_level, _file_level))
+
+def worker_initializer(log_queue, level=logging.DEBUG):
+    """
+    工作进程的初始化函数：移除从主进程继承的处理器，日志只通过 log_queue 发送给主进程
+    每条日志会带上 worker 字段（工作进程名称），文本格式的文件日志中显示为进程名称。
+    """
+    global _listener, _queue_handler, _aggregation_filters, _mp_listener, _mp_queue, _multiprocess_enabled
+    from lib import log_handlers
+
+    # fork 方式启动时会继承主进程的全局状态，这些对象属于主进程，工作进程中不能再停止或输出
+    _listener = _queue_handler = _mp_listener = _mp_queue = None
+    _aggregation_filters = []
+    _multiprocess_enabled = False
+
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+    root_logger.addHandler(log_handlers.WorkerQueueHandler(log_queue))
+    root_logger.setLevel(level)
+
+def _stop_mp_listener():
+    """停止接收工作进程日志的线程，并把队列中剩余的日志交给主进程的处理器"""
+    global _mp_listener
+    if _mp_listener is not None:
+        listener, _mp_listener = _mp_listener, None
+        listener.stop()
+
+def flush_aggregation():
+    """立即输出所有尚未汇总的重复日志计数"""
+    for aggregation_filter in _aggregation_filters:
+        aggregation_filter.flush_summaries()
+
+def _shutdown():
+    """退出时先接收工作进程剩余的日志，再输出队列中剩余的日志，最后输出重复日志的汇总"""
+    _stop_mp_listener()
+    stop_listener()
+    flush_aggregation()
+
+def stop_listener():
+    """停止后台日志线程，并输出队列中剩余的日志"""
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    queue_handler, _queue_handler = _queue_handler, None
+    # 先让新日志直接交给处理器，再停止监听线程：停止后队列不再被消费，
+    # 而且 drop_old 策略会从队列中取走最早的一条，可能正好是结束标记
+    root_logger = logging.getLogger()
+    if queue_handler in root_logger.handlers:
+        root_logger.removeHandler(queue_handler)
+        for handler in listener.handlers:
+            root_logger.addHandler(handler)
+    listener.stop()
+    if queue_handler.dropped:
+        record = logging.LogRecord(
+            "root", logging.WARNING, __file__, 0, f"日志队列已满，共丢弃 {queue_handler.dropped} 条日志", None, None
+        )
+        for handler in listener.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+    for handler in listener.handlers:
+        handler.flush()
+
 def setup_logging():
     """设置日志配置"""
-    global _log_path
-    
+    global _log_path, _listener, _queue_handler, _aggregation_filters, _mp_queue, _mp_listener
+    from lib import log_handlers
+
+    # 先输出旧的后台线程中剩余的日志和旧处理器上的重复日志汇总
+    _shutdown()
+
     # 确保日志目录存在
     if not os.path.exists(os.path.dirname(_log_path)):
         os.makedirs(os.path.dirname(_log_path), exist_ok=True)
 
-    # 清除现有的处理器
+    # 清除并关闭现有的处理器（后台线程已停止，不会再使用它们），否则每次重新配置都会留下一个打开的日志文件，
+    # Windows 上还会因为文件被占用而无法轮转
     root_logger = logging.getLogger()
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
+        handler.close()
 
     # 创建控制台处理器（带颜色）
-    console_handler = CustomRichHandler()
+    console_handler = log_handlers.CustomRichHandler()
     console_handler.setLevel(_console_level)
     console_handler.setFormatter(logging.Formatter("%(message)s"))
 
     # 创建文件处理器（不带颜色）
-    file_handler = logging.FileHandler(_log_path, encoding='utf-8')
+    if _max_bytes > 0 or _rotate_when:
+        file_handler = log_handlers.CompressingRotatingFileHandler(
+            _log_path, _max_bytes, _rotate_when, _rotate_interval, _backup_count, _compress, encoding='utf-8'
+        )
+    else:
+        file_handler = logging.FileHandler(_log_path, encoding='utf-8')
     file_handler.setLevel(_file_level)
-    file_formatter = logging.Formatter(
-        '%(asctime)s - %(levelname)-8s - %(lineno)-3d - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    if _file_format == "json":
+        file_formatter = log_handlers.JsonLinesFormatter()
+    elif _multiprocess_enabled:
+        # 多进程模式下写入进程名称，区分主进程和各个工作进程的日志
+        file_formatter = logging.Formatter(
+            '%(asctime)s - %(levelname)-8s - %(processName)s - %(lineno)-3d - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
+    else:
+        file_formatter = logging.Formatter(
+            '%(asctime)s - %(levelname)-8s - %(lineno)-3d - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
     file_handler.setFormatter(file_formatter)
 
+    # 重复日志合并，每个处理器单独计数
+    _aggregation_filters = []
+    if _aggregate_enabled:
+        handlers = [console_handler] if _aggregate_file_full_detail else [console_handler, file_handler]
+        for handler in handlers:
+            aggregation_filter = log_handlers.RepeatAggregationFilter(
+                handler, _aggregate_first, _aggregate_interval, _aggregate_rate
+            )
+            handler.addFilter(aggregation_filter)
+            _aggregation_filters.append(aggregation_filter)
+
     # 配置日志
     # 根日志器设置为最低级别，确保所有日志都能传递到处理器
     root_logger.setLevel(min(_console_level, _file_level))
-    root_logger.addHandler(console_handler)
-    root_logger.addHandler(file_handler)
+    if _async_enabled:
+        import queue
+        log_queue = queue.Queue(_queue_size)
+        _queue_handler = log_handlers.BoundedQueueHandler(log_queue, _overflow_policy)
+        root_logger.addHandler(_queue_handler)
+        _listener = log_handlers.BlockingStopQueueListener(
+            log_queue, console_handler, file_handler, respect_handler_level=True
+        )
+        _listener.start()
+    else:
+        root_logger.addHandler(console_handler)
+        root_logger.addHandler(file_handler)
+
+    # 工作进程的日志交给根日志器当前的处理器（异步模式下即进入同一个队列），由主进程统一写入；
+    # 队列在重新配置时保留，已经启动的工作进程仍然可以继续发送
+    if _multiprocess_enabled:
+        import multiprocessing
+        from logging.handlers import QueueListener
+        if _mp_queue is None:
+            _mp_queue = multiprocessing.get_context(_mp_start_method).Queue()
+        _mp_listener = QueueListener(_mp_queue, *root_logger.handlers, respect_handler_level=True)
+        _mp_listener.start()
+    _register_at_exit()
+
+# ---------------------------------------------------------------------------
+# 计时区间、计数器和直方图
+# ---------------------------------------------------------------------------
+# 默认关闭；关闭时 span() 返回共享的空对象，count() / observe() 直接返回，timed() 包装的函数只多一次判断。
+# 开启后每个线程在自己的 _ThreadMetrics 中记录，不需要加锁，退出时才合并。
+
+_metrics_enabled = False
+_trace_path = None
+_trace_limit = 200000
+_thread_metrics = []
+_thread_metrics_lock = threading.Lock()
+_local = threading.local()
+_metrics_emitted = False
+
+class _ThreadMetrics:
+    def __init__(self):
+        thread = threading.current_thread()
+        self.thread_id = thread.ident
+        self.thread_name = thread.name
+        self.stack = []
+        self.spans = {}        # 名称 -> [次数, 总耗时, 自身耗时, 最大耗时]（纳秒）
+        self.counters = {}     # 名称 -> 值
+        self.histograms = {}   # 名称 -> [次数, 总和, 最小, 最大, {桶: 次数}]
+        self.events = []       # (名称, 开始, 耗时, 属性)，只在记录 Chrome trace 时使用
+
+def _get_thread_metrics():
+    metrics = getattr(_local, "metrics", None)
+    if metrics is None:
+        metrics = _local.metrics = _ThreadMetrics()
+        with _thread_metrics_lock:
+            _thread_metrics.append(metrics)
+    return metrics
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ("name", "attrs", "start", "child", "metrics")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.metrics = _get_thread_metrics()
+        self.child = 0
+        self.metrics.stack.append(self)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        duration = time.perf_counter_ns() - self.start
+        metrics = self.metrics
+        metrics.stack.pop()
+        # 嵌套的区间：子区间的耗时从父区间的自身耗时中扣除（按线程分别计算）
+        if metrics.stack:
+            metrics.stack[-1].child += duration
+        stats = metrics.spans.get(self.name)
+        if stats is None:
+            stats = metrics.spans[self.name] = [0, 0, 0, 0]
+        stats[0] += 1
+        stats[1] += duration
+        stats[2] += duration - self.child
+        if duration > stats[3]:
+            stats[3] = duration
+        if _trace_path and len(metrics.events) < _trace_limit:
+            metrics.events.append((self.name, self.start, duration, self.attrs))
+        return False
+
+def span(name, **attrs):
+    """
+    计时区间，用作上下文管理器：
+        with span("移动", 版本=版本名字):
+            ...
+    未开启统计时几乎没有开销。attrs 只写入 Chrome trace。
+    """
+    if not _metrics_enabled:
+        return _NULL_SPAN
+    return _Span(name, attrs or None)
+
+def timed(name=None):
+    """
+    计时装饰器，区间名称默认为函数的限定名：
+        @timed("构建版本")
+        def build_version(...): ...
+    """
+    def decorator(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _metrics_enabled:
+                return func(*args, **kwargs)
+            with _Span(label, None):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def count(name, value=1):
+    """累加命名计数器"""
+    if not _metrics_enabled:
+        return
+    counters = _get_thread_metrics().counters
+    counters[name] = counters.get(name, 0) + value
+
+def observe(name, value):
+    """向命名直方图记录一个值（按 2 的幂分桶）"""
+    if not _metrics_enabled:
+        return
+    histograms = _get_thread_metrics().histograms
+    stats = histograms.get(name)
+    if stats is None:
+        stats = histograms[name] = [0, 0, value, value, {}]
+    stats[0] += 1
+    stats[1] += value
+    if value < stats[2]:
+        stats[2] = value
+    if value > stats[3]:
+        stats[3] = value
+    bucket = math.frexp(value)[1] if value > 0 else 0
+    stats[4][bucket] = stats[4].get(bucket, 0) + 1
+
+def enable_metrics(enabled=True, trace_path=None, trace_limit=None):
+    """
+    开启计时区间、计数器和直方图统计
+    - trace_path: 可选，退出时把所有区间写入该 Chrome trace JSON 文件（可在 chrome://tracing 或 Perfetto 中打开）
+    - trace_limit: 每个线程最多记录的区间数（可选，默认 200000）
+    退出时会输出汇总表。
+    """
+    global _metrics_enabled, _trace_path, _trace_limit
+    _metrics_enabled = enabled
+    _trace_path = trace_path
+    if trace_limit is not None:
+        _trace_limit = trace_limit
+    if enabled:
+        _register_at_exit()
+
+def _histogram_quantile(buckets, total, q):
+    """按桶估算分位数，返回所在桶的上界"""
+    seen = 0
+    for bucket in sorted(buckets):
+        seen += buckets[bucket]
+        if seen >= q * total:
+            return math.ldexp(1, bucket)
+    return 0
+
+def get_metrics():
+    """合并所有线程的统计结果
+
+    Returns:
+        dict: {"spans": {名称: {...}}, "counters": {名称: 值}, "histograms": {名称: {...}}}，耗时单位为毫秒
+    """
+    spans, counters, histograms = {}, {}, {}
+    with _thread_metrics_lock:
+        thread_metrics = list(_thread_metrics)
+    for metrics in thread_metrics:
+        for name, (calls, total, self_time, longest) in list(metrics.spans.items()):
+            merged = spans.setdefault(name, [0, 0, 0, 0])
+            merged[0] += calls
+            merged[1] += total
+            merged[2] += self_time
+            merged[3] = max(merged[3], longest)
+        for name, value in list(metrics.counters.items()):
+            counters[name] = counters.get(name, 0) + value
+        for name, (calls, total, low, high, buckets) in list(metrics.histograms.items()):
+            merged = histograms.setdefault(name, [0, 0, low, high, {}])
+            merged[0] += calls
+            merged[1] += total
+            merged[2] = min(merged[2], low)
+            merged[3] = max(merged[3], high)
+            for bucket, bucket_count in list(buckets.items()):
+                merged[4][bucket] = merged[4].get(bucket, 0) + bucket_count
+    return {
+        "spans": {
+            name: {"count": calls, "total_ms": total / 1e6, "self_ms": self_time / 1e6,
+                   "mean_ms": total / calls / 1e6, "max_ms": longest / 1e6}
+            for name, (calls, total, self_time, longest) in spans.items()
+        },
+        "counters": counters,
+        "histograms": {
+            name: {"count": calls, "mean": total / calls, "min": low, "max": high,
+                   "p50": min(_histogram_quantile(buckets, calls, 0.5), high),
+                   "p95": min(_histogram_quantile(buckets, calls, 0.95), high)}
+            for name, (calls, total, low, high, buckets) in histograms.items()
+        },
+    }
+
+def _pad(text, width, right=False):
+    """按显示宽度补齐（中文字符占两列），right 为 True 时右对齐"""
+    import unicodedata
+    text = str(text)
+    fill = " " * max(width - sum(2 if unicodedata.east_asian_width(char) in "WF" else 1 for char in text), 0)
+    return fill + text if right else text + fill
+
+def _row(name, *columns):
+    return _pad(name, 40) + "".join(" " + _pad(column, 12, right=True) for column in columns)
+
+def format_metrics(result=None):
+    """把统计结果格式化为汇总表"""
+    result = result or get_metrics()
+    lines = []
+    if result["spans"]:
+        lines.append(_row("区间", "次数", "总耗时(ms)", "自身(ms)", "平均(ms)", "最长(ms)"))
+        for name, stats in sorted(result["spans"].items(), key=lambda item: -item[1]["total_ms"]):
+            lines.append(_row(
+                name, stats["count"], f"{stats['total_ms']:.2f}", f"{stats['self_ms']:.2f}",
+                f"{stats['mean_ms']:.3f}", f"{stats['max_ms']:.3f}",
+            ))
+    if result["counters"]:
+        lines.append(_row("计数器", "值"))
+        for name, value in sorted(result["counters"].items()):
+            lines.append(_row(name, value))
+    if result["histograms"]:
+        lines.append(_row("直方图", "次数", "平均", "最小", "p50≤", "p95≤", "最大"))
+        for name, stats in sorted(result["histograms"].items()):
+            lines.append(_row(
+                name, stats["count"], f"{stats['mean']:.3f}", f"{stats['min']:.3f}",
+                f"{stats['p50']:.3f}", f"{stats['p95']:.3f}", f"{stats['max']:.3f}",
+            ))
+    return "\n".join(lines)
+
+def write_chrome_trace(path):
+    """把记录的区间写入 Chrome trace JSON 文件"""
+    import json
+    pid = os.getpid()
+    events = []
+    with _thread_metrics_lock:
+        thread_metrics = list(_thread_metrics)
+    for metrics in thread_metrics:
+        events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": metrics.thread_id,
+                       "args": {"name": metrics.thread_name}})
+        for name, start, duration, attrs in metrics.events:
+            event = {"name": name, "ph": "X", "pid": pid, "tid": metrics.thread_id,
+                     "ts": start / 1000, "dur": duration / 1000}
+            if attrs:
+                event["args"] = {key: str(value) for key, value in attrs.items()}
+            events.append(event)
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+
+def emit_metrics():
+    """输出汇总表，并按设置写入 Chrome trace；没有配置日志处理器时输出到标准错误"""
+    global _metrics_emitted
+    if not _metrics_enabled or _metrics_emitted:
+        return
+    _metrics_emitted = True
+    table = format_metrics()
+    if table:
+        if logging.getLogger().handlers:
+            logging.info("性能统计：\n%s", table)
+        else:
+            import sys
+            print(f"性能统计：\n{table}", file=sys.stderr)
+    if _trace_path:
+        write_chrome_trace(_trace_path)
+
+def _at_exit():
+    emit_metrics()
+    _shutdown()
 
-# 初始化日志配置
-setup_logging()
+def _register_at_exit():
+    # atexit 按注册的相反顺序执行，每次配置后重新注册，保证在之后才导入的模块（如 multiprocessing，
+    # 它的退出函数会关闭工作进程日志队列）之前输出剩余日志
+    atexit.unregister(_at_exit)
+    atexit.register(_at_exit)
 
 # 测试输出
+# configure()
 # logging.debug("调试信息")
 # logging.info("程序启动成功")
 # logging.warning("注意：某个配置项缺失")
@@ -0,0 +1,355 @@
+"""
+lib/log.py 使用的处理器和格式化器。
+只有在 lib/log.py 真正创建处理器时才会导入本模块（以及 Rich），导入 lib/log.py 本身不会加载它们。
+"""
+
+from rich.logging import RichHandler
+from rich.text import Text
+import logging
+import logging.handlers
+import datetime
+import gzip
+import json
+import math
+import queue
+import shutil
+import sys
+import threading
+import time
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ROTATE_UNITS = {"S": 1, "M": 60, "H": 3600, "D": 86400}
+# LogRecord 自带的属性，其余属性都是通过 extra 传入的结构化字段
+_RECORD_ATTRS = set(logging.LogRecord("", 0, "", 0, "", None, None).__dict__) | {"message", "asctime", "taskName"}
+_compress_executor = None
+
+class CustomRichHandler(RichHandler):
+    LEVEL_NAME_MAP = {
+        "CRITICAL": "[致命]",
+        "ERROR": "[错误]",
+        "WARNING": "[警告]",
+        "INFO": "[信息]",
+        "DEBUG": "[调试]",
+        "NOTSET": "[未设置]",
+    }
+
+    LEVEL_COLOR_MAP = {
+        "CRITICAL": "bold red",
+        "ERROR": "red",
+        "WARNING": "yellow",
+        "INFO": "green",
+        "DEBUG": "blue",
+        "NOTSET": "dim",
+    }
+
+    def get_level_text(self, record):
+        level_name = self.LEVEL_NAME_MAP.get(record.levelname, record.levelname)
+        color = self.LEVEL_COLOR_MAP.get(record.levelname, "white")
+        return Text(level_name, style=color)
+
+class JsonLinesFormatter(logging.Formatter):
+    """每条日志输出为一行 JSON：time、level、logger、module、line、message，以及 extra 传入的字段
+
+    只有通过级别过滤、真正写入的日志才会调用 format，消息参数在这里才拼接。
+    有 orjson 时用它序列化，否则使用标准库 json。
+    """
+
+    def format(self, record):
+        data = {
+            "time": datetime.datetime.fromtimestamp(record.created).astimezone().isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "line": record.lineno,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and key not in data:
+                data[key] = value
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            data["stack_info"] = self.formatStack(record.stack_info)
+        return dumps_json(data)
+
+def dumps_json(data):
+    """序列化为一行 JSON，无法序列化的值转为字符串"""
+    if orjson is not None:
+        return orjson.dumps(data, default=str).decode("utf-8")
+    return json.dumps(data, ensure_ascii=False, default=str)
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """有界队列的 QueueHandler，队列满时按溢出策略处理
+
+    - block: 阻塞直到队列有空位，不丢日志
+    - drop_new: 丢弃当前这条日志
+    - drop_old: 丢弃队列中最早的一条日志
+    """
+
+    def __init__(self, log_queue, overflow_policy="block"):
+        super().__init__(log_queue)
+        self.overflow_policy = overflow_policy
+        self.dropped = 0
+
+    def prepare(self, record):
+        # 队列只在本进程的线程间传递，不需要像默认实现那样提前格式化消息，格式化留给监听线程
+        return record
+
+    def enqueue(self, record):
+        if self.overflow_policy == "block":
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # 多个线程可能同时丢弃日志；handle() 调用 emit 时已持有 self.lock（RLock），直接调用 enqueue 时也要加锁
+            with self.lock:
+                if self.overflow_policy == "drop_old":
+                    try:
+                        self.queue.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+                    try:
+                        self.queue.put_nowait(record)
+                        return
+                    except queue.Full:
+                        # 取出一条后又被其他线程放满，当前这条也丢弃
+                        pass
+                self.dropped += 1
+
+class BlockingStopQueueListener(logging.handlers.QueueListener):
+    """停止时阻塞等待队列有空位再放入结束标记的 QueueListener
+
+    默认实现用 put_nowait 放入结束标记，有界队列已满（drop_new / drop_old 策略下很常见）时会抛出 queue.Full，
+    退出时剩余日志、丢弃计数和重复日志汇总都不会输出。监听线程仍在消费队列，阻塞等待总能成功。
+    """
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+class WorkerQueueHandler(logging.handlers.QueueHandler):
+    """工作进程中使用的 QueueHandler，日志经 multiprocessing 队列发送给主进程
+
+    发送前由默认的 prepare 拼接消息参数、把异常格式化为文本（traceback 不能跨进程传递），
+    并加上 worker 字段；extra 传入的不是基本类型的字段转为字符串，保证可以序列化。
+    """
+
+    def prepare(self, record):
+        record = super().prepare(record)
+        record.worker = record.processName
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not isinstance(value, (str, int, float, bool, type(None))):
+                record.__dict__[key] = str(value)
+        return record
+
+def _get_compress_executor():
+    """轮转后的压缩在单个后台线程中进行；解释器退出前会等待未完成的压缩"""
+    global _compress_executor
+    if _compress_executor is None:
+        from concurrent.futures import ThreadPoolExecutor
+        _compress_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="log-compress")
+    return _compress_executor
+
+class CompressingRotatingFileHandler(logging.handlers.BaseRotatingHandler):
+    """按大小和/或时间轮转的文件处理器
+
+    轮转后的文件命名为 `app.log.20251019-083000-123456`（末尾为微秒），压缩后再加 `.gz`，
+    只保留最新的 backup_count 个。压缩和清理在后台线程中进行，轮转本身只是一次重命名。
+    """
+
+    def __init__(self, filename, max_bytes=0, when=None, interval=1, backup_count=5, compress=True, encoding=None):
+        super().__init__(filename, 'a', encoding=encoding, delay=False)
+        self.max_bytes = max_bytes
+        self.when = when.upper() if when else None
+        if self.when and self.when != "MIDNIGHT" and self.when not in ROTATE_UNITS:
+            raise ValueError(f"未知的轮转时间单位：{when}，可选值为 S、M、H、D、midnight")
+        self.interval = max(interval, 1)
+        self.backup_count = backup_count
+        self.compress = compress
+        # 以已有日志文件的修改时间为起点，定时运行的短任务也能按时间轮转
+        start = os.path.getmtime(self.baseFilename) if os.path.exists(self.baseFilename) else time.time()
+        self.rollover_at = self._compute_rollover(start)
+
+    def _compute_rollover(self, current_time):
+        if not self.when:
+            return None
+        if self.when == "MIDNIGHT":
+            t = time.localtime(current_time)
+            return time.mktime((t.tm_year, t.tm_mon, t.tm_mday + self.interval, 0, 0, 0, 0, 0, -1))
+        return current_time + self.interval * ROTATE_UNITS[self.when]
+
+    def shouldRollover(self, record):
+        if self.rollover_at is not None and time.time() >= self.rollover_at:
+            return True
+        if self.max_bytes > 0:
+            if self.stream is None:
+                self.stream = self._open()
+            msg = "%s\n" % self.format(record)
+            return self.stream.tell() + len(msg.encode(self.encoding or "utf-8")) >= self.max_bytes
+        return False
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        now = time.time()
+        # 名称定长，按名称排序即按轮转时间排序
+        rotated = f"{self.baseFilename}.{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}-{int(now * 1e6) % 1000000:06d}"
+        while os.path.exists(rotated) or os.path.exists(rotated + ".gz"):
+            rotated += "0"
+        if os.path.exists(self.baseFilename):
+            os.rename(self.baseFilename, rotated)
+            try:
+                _get_compress_executor().submit(self._compress_and_prune, rotated)
+            except RuntimeError:
+                # 解释器退出时（异步模式在 atexit 中输出剩余日志）不能再提交后台任务，直接在当前线程处理
+                self._compress_and_prune(rotated)
+        if self.rollover_at is not None:
+            self.rollover_at = self._compute_rollover(now)
+        self.stream = self._open()
+
+    def _compress_and_prune(self, rotated):
+        try:
+            if self.compress:
+                with open(rotated, 'rb') as src, gzip.open(rotated + ".gz.tmp", 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+                os.replace(rotated + ".gz.tmp", rotated + ".gz")
+                os.remove(rotated)
+            self._prune()
+        except Exception as e:
+            # 后台线程中不能再通过 logging 报告，避免递归触发轮转
+            print(f"日志轮转后处理失败：{e}", file=sys.stderr)
+
+    def _prune(self):
+        """删除超出保留数量的旧日志"""
+        if self.backup_count <= 0:
+            return
+        directory, base = os.path.split(self.baseFilename)
+        rotated_files = sorted(
+            name for name in os.listdir(directory)
+            if name.startswith(base + ".") and not name.endswith(".tmp")
+        )
+        for name in rotated_files[:-self.backup_count]:
+            os.remove(os.path.join(directory, name))
+
+class _TemplateState:
+    __slots__ = ("total", "suppressed", "window_start", "tokens", "last_refill", "last_record")
+
+    def __init__(self, now, rate):
+        self.total = 0
+        self.suppressed = 0
+        self.window_start = now
+        self.tokens = rate
+        self.last_refill = now
+        self.last_record = None
+
+class RepeatAggregationFilter(logging.Filter):
+    """按日志器和消息模板合并重复日志的过滤器，挂在某个处理器上
+
+    同一模板的前 first 条照常输出；之后每个模板每秒最多再输出 rate 条，其余只计数，
+    每隔 interval 秒（以及重新配置和退出时）输出一条 "……还有 N 条类似日志" 的汇总。
+    汇总由定时器按时输出，不依赖之后是否还有日志；经过过滤器的任何日志也会顺带输出已到时间的汇总。
+    消息模板是 % 格式的原始消息；f-string 拼好的消息每次都不同，改用调用位置（文件和行号）作为模板。
+    高于 max_level 的日志（默认为警告及以上）不合并。
+    """
+
+    def __init__(self, handler, first=20, interval=5.0, rate=0, max_level=logging.INFO):
+        super().__init__()
+        self.handler = handler
+        self.first = first
+        self.interval = interval
+        self.rate = rate
+        self.max_level = max_level
+        self.states = {}
+        self.lock = threading.Lock()
+        # 最早一个到时间的汇总，以及等待它的定时器
+        self.next_due = math.inf
+        self.timer = None
+
+    def filter(self, record):
+        if time.monotonic() >= self.next_due:
+            self.flush_due()
+        if record.levelno > self.max_level or getattr(record, "aggregated_summary", False):
+            return True
+        template = record.msg if record.args and isinstance(record.msg, str) else (record.pathname, record.lineno)
+        key = (record.name, template)
+        now = time.monotonic()
+        with self.lock:
+            state = self.states.get(key)
+            if state is None:
+                state = self.states[key] = _TemplateState(now, self.rate)
+            state.total += 1
+            if state.total <= self.first:
+                return True
+            if self.rate:
+                state.tokens = min(self.rate, state.tokens + (now - state.last_refill) * self.rate)
+                state.last_refill = now
+                if state.tokens >= 1:
+                    state.tokens -= 1
+                    return True
+            if state.suppressed == 0:
+                state.window_start = now
+                self.next_due = min(self.next_due, now + self.interval)
+                self._schedule(now)
+            state.suppressed += 1
+            state.last_record = record
+        return False
+
+    def _schedule(self, now):
+        """没有等待中的定时器时，为最早到时间的汇总启动一个，调用时需持有锁"""
+        if self.timer is None and self.next_due != math.inf:
+            self.timer = threading.Timer(max(0.0, self.next_due - now), self._on_timer)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def _on_timer(self):
+        with self.lock:
+            self.timer = None
+        self.flush_due()
+
+    def flush_due(self):
+        """输出已到 interval 的汇总，并为之后到时间的汇总安排定时器"""
+        now = time.monotonic()
+        with self.lock:
+            summaries = [
+                self._take_summary(state, now) for state in self.states.values()
+                if state.suppressed and now - state.window_start >= self.interval
+            ]
+            self.next_due = min(
+                (state.window_start + self.interval for state in self.states.values() if state.suppressed),
+                default=math.inf,
+            )
+            self._schedule(now)
+        for summary in summaries:
+            self.handler.handle(summary)
+
+    def _take_summary(self, state, now):
+        """生成汇总日志并清零计数，调用时需持有锁"""
+        last = state.last_record
+        summary = logging.LogRecord(
+            last.name, last.levelno, last.pathname, last.lineno,
+            "……还有 %d 条类似日志（共 %d 条），最后一条：%s", (state.suppressed, state.total, last.getMessage()), None,
+        )
+        summary.aggregated_summary = True
+        state.suppressed = 0
+        state.window_start = now
+        state.last_record = None
+        return summary
+
+    def flush_summaries(self):
+        """输出所有模板尚未汇总的计数，并取消等待中的定时器"""
+        now = time.monotonic()
+        with self.lock:
+            summaries = [self._take_summary(state, now) for state in self.states.values() if state.suppressed]
+            self.next_due = math.inf
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        for summary in summaries:
+            self.handler.handle(summary)
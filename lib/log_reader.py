@@ -0,0 +1,135 @@
+"""
+按字段过滤 JSON 行格式日志（见 lib/log.py 的 set_log_format("json")）的小工具。
+逐行流式读取，不会把整个文件读入内存；支持轮转后压缩的 .gz 文件。
+
+用法：
+    python -m lib.log_reader log/版本隔离.log --level WARNING
+    python -m lib.log_reader log/版本隔离.log* --field 操作=移动 --since 2026-10-19 --text
+"""
+
+import datetime
+import gzip
+import json
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+
+def open_log(path):
+    """打开日志文件，.gz 结尾的按 gzip 解压"""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, "r", encoding="utf-8", errors="replace")
+
+def encode_value(value):
+    """字段值的 JSON 编码，过滤时按编码比较，因此 true 与 "true"、1 与 "1" 是不同的值"""
+    return json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+def parse_field_value(text):
+    """命令行中的字段值：能按 JSON 解析时（true、null、3）同时匹配解析结果和原字符串，否则只匹配字符串"""
+    try:
+        return frozenset((json.loads(text), text))
+    except (ValueError, TypeError):
+        return text
+
+def _needle(value):
+    """能在原始行中直接查找的子串；对象和数组的写法因序列化库而异，不做预过滤"""
+    if isinstance(value, (dict, list)):
+        return ""
+    encoded = encode_value(value)
+    return encoded[1:-1] if isinstance(value, str) else encoded
+
+def parse_time(value):
+    """解析 ISO 8601 时间，没有时区的按本地时间处理"""
+    parsed = datetime.datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.astimezone()
+
+def iter_records(paths, level=None, since=None, until=None, fields=None, contains=None):
+    """逐条产出满足条件的日志
+
+    Args:
+        paths: 日志文件路径列表，按顺序读取
+        level: 最低级别名称，如 "WARNING"
+        since / until: datetime，只保留该时间范围内的日志
+        fields: {字段名: 值}，字段存在且与值的 JSON 编码相等才保留；值为 set / frozenset 时与其中任一相等即可
+        contains: 只保留 message 中包含该字符串的日志
+
+    Returns:
+        迭代器，产出日志字典；不是 JSON 的行（如 text 格式的日志）会被跳过
+    """
+    min_level = LEVELS.get(level.upper(), 0) if level else 0
+    fields = {
+        key: values if isinstance(values, (set, frozenset)) else (values,)
+        for key, values in (fields or {}).items()
+    }
+    # 先在原始行上做子串匹配，不匹配的行不需要解析；每个字段的任一候选值出现即可
+    needles = [{_needle(value) for value in values} for values in fields.values()]
+    fields = {key: {encode_value(value) for value in values} for key, values in fields.items()}
+    if contains:
+        needles.append({_needle(contains)})
+
+    for path in paths:
+        with open_log(path) as f:
+            for line in f:
+                if not line.startswith("{") or not all(any(needle in line for needle in group) for group in needles):
+                    continue
+                try:
+                    record = _loads(line)
+                except ValueError:
+                    continue
+                if min_level and LEVELS.get(record.get("level"), 0) < min_level:
+                    continue
+                if any(key not in record or encode_value(record[key]) not in values for key, values in fields.items()):
+                    continue
+                if contains and contains not in record.get("message", ""):
+                    continue
+                if since or until:
+                    created = parse_time(record["time"])
+                    if (since and created < since) or (until and created > until):
+                        continue
+                yield record
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='按字段过滤 JSON 行格式的日志')
+    parser.add_argument('paths', nargs='+', help='日志文件，可以是轮转后的 .gz 文件')
+    parser.add_argument('--level', '-l', choices=list(LEVELS), help='最低日志级别')
+    parser.add_argument('--field', '-f', action='append', default=[], metavar='键=值', help='字段等于指定值，可重复指定；true、null、数字等同时匹配 JSON 值和字符串')
+    parser.add_argument('--grep', '-g', help='消息中包含的字符串')
+    parser.add_argument('--since', help='起始时间，如 2026-10-19 或 2026-10-19T08:00')
+    parser.add_argument('--until', help='结束时间')
+    parser.add_argument('--limit', '-n', type=int, help='最多输出的条数')
+    parser.add_argument('--text', action='store_true', help='输出为 `时间 级别 消息` 文本，而不是原始 JSON')
+    args = parser.parse_args()
+
+    fields = {}
+    for item in args.field:
+        key, sep, value = item.partition("=")
+        if not sep:
+            parser.error(f"字段过滤条件应为 键=值 形式：{item}")
+        fields[key] = parse_field_value(value)
+
+    records = iter_records(
+        args.paths, args.level,
+        parse_time(args.since) if args.since else None,
+        parse_time(args.until) if args.until else None,
+        fields, args.grep,
+    )
+    for count, record in enumerate(records, 1):
+        if args.text:
+            print(f"{record.get('time')} {record.get('level', ''):<8} {record.get('message', '')}")
+        else:
+            print(json.dumps(record, ensure_ascii=False))
+        if args.limit and count >= args.limit:
+            break
+
+if __name__ == "__main__":
+    try:
+        main()
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
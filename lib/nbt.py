@@ -0,0 +1,147 @@
+"""
+按需读取 NBT 数据的工具。
+只查找调用者需要的标签：不需要的标签直接跳过，不构建对象；需要的标签全部找到后立即停止读取，
+配合流式解压（gzip.open / region.open_chunk）时，文件后面的数据不会被解压。
+"""
+
+import struct
+
+TAG_END = 0
+TAG_BYTE = 1
+TAG_SHORT = 2
+TAG_INT = 3
+TAG_LONG = 4
+TAG_FLOAT = 5
+TAG_DOUBLE = 6
+TAG_BYTE_ARRAY = 7
+TAG_STRING = 8
+TAG_LIST = 9
+TAG_COMPOUND = 10
+TAG_INT_ARRAY = 11
+TAG_LONG_ARRAY = 12
+
+_SCALARS = {
+    TAG_BYTE: struct.Struct(">b"),
+    TAG_SHORT: struct.Struct(">h"),
+    TAG_INT: struct.Struct(">i"),
+    TAG_LONG: struct.Struct(">q"),
+    TAG_FLOAT: struct.Struct(">f"),
+    TAG_DOUBLE: struct.Struct(">d"),
+}
+_ARRAY_ITEMS = {TAG_BYTE_ARRAY: "b", TAG_INT_ARRAY: "i", TAG_LONG_ARRAY: "q"}
+_u16 = struct.Struct(">H")
+_i32 = struct.Struct(">i")
+
+class _Done(Exception):
+    """需要的标签已全部找到"""
+
+class _Reader:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def read(self, size):
+        data = self.stream.read(size)
+        while len(data) < size:
+            more = self.stream.read(size - len(data))
+            if not more:
+                raise EOFError("NBT 数据意外结束")
+            data += more
+        return data
+
+    def skip(self, size):
+        while size > 0:
+            step = min(size, 64 * 1024)
+            self.read(step)
+            size -= step
+
+    def u8(self):
+        return self.read(1)[0]
+
+    def u16(self):
+        return _u16.unpack(self.read(2))[0]
+
+    def i32(self):
+        return _i32.unpack(self.read(4))[0]
+
+    def string(self):
+        return self.read(self.u16()).decode("utf-8", "replace")
+
+def _skip_payload(reader, tag_type):
+    scalar = _SCALARS.get(tag_type)
+    if scalar:
+        reader.skip(scalar.size)
+    elif tag_type in _ARRAY_ITEMS:
+        reader.skip(reader.i32() * struct.calcsize(_ARRAY_ITEMS[tag_type]))
+    elif tag_type == TAG_STRING:
+        reader.skip(reader.u16())
+    elif tag_type == TAG_LIST:
+        item_type = reader.u8()
+        count = reader.i32()
+        if item_type in _SCALARS:
+            reader.skip(count * _SCALARS[item_type].size)
+        else:
+            for _ in range(count):
+                _skip_payload(reader, item_type)
+    elif tag_type == TAG_COMPOUND:
+        while True:
+            child_type = reader.u8()
+            if child_type == TAG_END:
+                return
+            reader.skip(reader.u16())
+            _skip_payload(reader, child_type)
+    else:
+        raise ValueError(f"未知的 NBT 标签类型: {tag_type}")
+
+def _read_payload(reader, tag_type):
+    """读取标量、字符串和数组；列表和复合标签不展开，返回 None"""
+    scalar = _SCALARS.get(tag_type)
+    if scalar:
+        return scalar.unpack(reader.read(scalar.size))[0]
+    if tag_type == TAG_STRING:
+        return reader.string()
+    if tag_type in _ARRAY_ITEMS:
+        item_format = f">{reader.i32()}{_ARRAY_ITEMS[tag_type]}"
+        return list(struct.unpack(item_format, reader.read(struct.calcsize(item_format))))
+    _skip_payload(reader, tag_type)
+    return None
+
+def _scan_compound(reader, path, wanted, prefixes, result, stop_when):
+    while True:
+        tag_type = reader.u8()
+        if tag_type == TAG_END:
+            return
+        child = path + (reader.string(),)
+        if child in wanted:
+            result[child] = _read_payload(reader, tag_type)
+            if stop_when(result):
+                raise _Done
+        elif tag_type == TAG_COMPOUND and child in prefixes:
+            _scan_compound(reader, child, wanted, prefixes, result, stop_when)
+        else:
+            _skip_payload(reader, tag_type)
+
+def read_tags(stream, paths, stop_when=None):
+    """从未压缩的 NBT 流中读取指定路径的标签
+
+    Args:
+        stream: 二进制流，只需要支持 read(n)
+        paths: 标签路径列表，如 [("Data", "LevelName"), ("Data", "Version", "Name")]
+        stop_when: 可选，参数为当前结果字典，返回 True 时停止读取；默认在所有路径都找到后停止
+
+    Returns:
+        dict: {路径元组: 值}，不存在的路径不会出现在结果中
+    """
+    wanted = {tuple(path) for path in paths}
+    prefixes = {path[:i] for path in wanted for i in range(1, len(path))}
+    if stop_when is None:
+        stop_when = lambda result: len(result) == len(wanted)
+    result = {}
+    reader = _Reader(stream)
+    if reader.u8() != TAG_COMPOUND:
+        raise ValueError("NBT 根标签不是复合标签")
+    reader.skip(reader.u16())
+    try:
+        _scan_compound(reader, (), wanted, prefixes, result, stop_when)
+    except _Done:
+        pass
+    return result
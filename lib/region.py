@@ -0,0 +1,160 @@
+"""
+Minecraft 区域文件（.mca）读取工具。
+区域文件以 4 KiB 扇区为单位：第一个扇区是 1024 个区块的位置表，第二个扇区是时间戳表，
+之后是各区块的数据。每个区块的数据以 4 字节长度开头，随后是 1 字节压缩类型和压缩后的 NBT。
+"""
+
+import io
+import os
+import gzip
+import zlib
+import struct
+
+SECTOR_SIZE = 4096
+HEADER_SIZE = 2 * SECTOR_SIZE
+CHUNKS_PER_REGION = 1024
+
+# 区块数据的压缩类型，最高位为 1 表示数据存放在外部的 c.<x>.<z>.mcc 文件中
+COMPRESSION_GZIP = 1
+COMPRESSION_ZLIB = 2
+COMPRESSION_NONE = 3
+COMPRESSION_LZ4 = 4
+COMPRESSION_EXTERNAL = 0x80
+
+_header_struct = struct.Struct(">1024I")
+
+def parse_header(header):
+    """解析 8 KiB 头部
+
+    Args:
+        header: 区域文件的前 8192 字节（bytes 或 mmap）
+
+    Returns:
+        tuple: (locations, timestamps)
+            locations[i] 为 (扇区偏移, 扇区数)，未生成的区块为 (0, 0)
+            timestamps[i] 为区块最后保存的时间（Unix 秒）
+    """
+    if len(header) < HEADER_SIZE:
+        raise ValueError(f"区域文件头部不完整: {len(header)} 字节")
+    locations = [(v >> 8, v & 0xFF) for v in _header_struct.unpack_from(header, 0)]
+    timestamps = list(_header_struct.unpack_from(header, SECTOR_SIZE))
+    return locations, timestamps
+
+def chunk_payload(data, offset, sector_count):
+    """取出区块实际占用的字节：4 字节长度 + 压缩类型 + 压缩数据，不含扇区末尾的填充
+
+    Returns:
+        bytes: 区块数据，位置无效或数据损坏时返回 None
+    """
+    start = offset * SECTOR_SIZE
+    if sector_count == 0 or offset < 2 or start + 5 > len(data):
+        return None
+    length = int.from_bytes(data[start:start + 4], "big")
+    end = start + 4 + length
+    if length == 0 or end > start + sector_count * SECTOR_SIZE or end > len(data):
+        return None
+    return data[start:end]
+
+def iter_chunks(data):
+    """遍历区域文件中已生成的区块
+
+    Args:
+        data: 整个区域文件的内容（bytes 或 mmap）
+
+    Yields:
+        tuple: (索引, 扇区偏移, 扇区数, 时间戳, 区块数据)，区块数据损坏时为 None
+    """
+    locations, timestamps = parse_header(data)
+    for index, (offset, sector_count) in enumerate(locations):
+        if offset == 0 and sector_count == 0:
+            continue
+        yield index, offset, sector_count, timestamps[index], chunk_payload(data, offset, sector_count)
+
+def is_external(payload):
+    """区块数据是否存放在外部 .mcc 文件中"""
+    return bool(payload[4] & COMPRESSION_EXTERNAL)
+
+def chunk_coords(region_name, index):
+    """根据区域文件名（r.<x>.<z>.mca）和索引计算区块坐标"""
+    _, region_x, region_z, _ = region_name.split(".")
+    return int(region_x) * 32 + index % 32, int(region_z) * 32 + index // 32
+
+class _ZlibStream(io.RawIOBase):
+    """按需解压的 zlib 流，只解压读取到的部分"""
+
+    def __init__(self, data, step=16 * 1024):
+        self.data = memoryview(data)
+        self.position = 0
+        self.step = step
+        self.decompressor = zlib.decompressobj()
+        self.buffer = b""
+        self.offset = 0
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        available = len(self.buffer) - self.offset
+        while (size < 0 or available < size) and not self.decompressor.eof:
+            if self.position >= len(self.data):
+                tail = self.decompressor.flush()
+            else:
+                chunk = self.data[self.position:self.position + self.step]
+                self.position += len(chunk)
+                tail = self.decompressor.decompress(chunk)
+            # 只在补充数据时丢弃已读部分，避免每次小读取都复制整个缓冲区
+            self.buffer = self.buffer[self.offset:] + tail
+            self.offset = 0
+            available = len(self.buffer)
+            if not tail and self.position >= len(self.data):
+                break
+        if size < 0 or size > available:
+            size = available
+        result = self.buffer[self.offset:self.offset + size]
+        self.offset += size
+        return result
+
+def open_chunk(payload):
+    """把区块数据（chunk_payload 的返回值）打开为可流式读取的未压缩 NBT
+
+    Returns:
+        二进制流；外部区块返回 None，需要调用者读取 .mcc 文件
+    """
+    compression = payload[4]
+    if compression & COMPRESSION_EXTERNAL:
+        return None
+    data = memoryview(payload)[5:]
+    if compression == COMPRESSION_ZLIB:
+        return _ZlibStream(data)
+    if compression == COMPRESSION_GZIP:
+        return gzip.GzipFile(fileobj=io.BytesIO(data))
+    if compression == COMPRESSION_NONE:
+        return io.BytesIO(data)
+    raise ValueError(f"不支持的区块压缩类型: {compression}")
+
+def write_region(path, chunks):
+    """紧凑地写出区域文件，区块依次排列，不留空闲扇区
+
+    Args:
+        path: 输出路径，先写入临时文件再替换
+        chunks: [(索引, 时间戳, 区块数据), ...]，区块数据为 chunk_payload 的返回值
+    """
+    locations = [0] * CHUNKS_PER_REGION
+    timestamps = [0] * CHUNKS_PER_REGION
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.seek(HEADER_SIZE)
+        offset = 2
+        for index, timestamp, payload in chunks:
+            sector_count = -(-len(payload) // SECTOR_SIZE)
+            if sector_count > 0xFF:
+                raise ValueError(f"区块 {index} 过大，无法写入区域文件")
+            f.write(payload)
+            f.write(bytes(sector_count * SECTOR_SIZE - len(payload)))
+            locations[index] = (offset << 8) | sector_count
+            timestamps[index] = timestamp
+            offset += sector_count
+        f.seek(0)
+        f.write(_header_struct.pack(*locations))
+        f.write(_header_struct.pack(*timestamps))
+    os.replace(temp_path, path)
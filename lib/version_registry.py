@@ -0,0 +1,130 @@
+"""
+Minecraft 版本号与数据包格式、资源包格式、各项格式变化分界版本的对照表，数据包打包工具和小工具共用。
+数据来自同目录的 version_registry.json，第一次查询时才读取。
+版本号打包为一个整数（主版本、次版本、修订号各占 16 位），分界点和范围起点按顺序存放在数组中，
+每次查询只需一次解析（有缓存）和一次二分查找。
+
+    from lib.version_registry import datapack_format, resourcepack_format, feature
+    datapack_format("1.21.8")                 # 81
+    resourcepack_format("Fabric 1.20.1")      # 15
+    feature("recipe_folder", "1.20.4")        # "recipes"
+"""
+
+from array import array
+import bisect
+import functools
+import json
+import os
+import re
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "version_registry.json")
+
+_VERSION_PATTERN = re.compile(r'(\d+)\.(\d+)(?:\.(\d+))?')
+_registry = None
+
+@functools.lru_cache(maxsize=4096)
+def parse_version(text):
+    """把 "1.21"、"1.21.8"、"1.21.10 原版" 解析为打包后的整数；无法解析（如快照 "25w31a"）时返回 None"""
+    match = _VERSION_PATTERN.search(text)
+    if not match:
+        return None
+    major, minor, patch = (int(part or 0) for part in match.groups())
+    return (major << 32) | (minor << 16) | patch
+
+def format_version(packed):
+    """parse_version 的逆运算，修订号为 0 时省略"""
+    major, minor, patch = packed >> 32, (packed >> 16) & 0xFFFF, packed & 0xFFFF
+    return f"{major}.{minor}.{patch}" if patch else f"{major}.{minor}"
+
+def _require_version(version):
+    packed = version if isinstance(version, int) else parse_version(version)
+    if packed is None:
+        raise ValueError(f"无法解析的版本号：{version}")
+    return packed
+
+class RangeTable:
+    """按版本范围查值的表，范围之间不能重叠
+
+    entries 为 (最小版本, 最大版本, 值)，版本可以是字符串或打包后的整数。
+    """
+
+    def __init__(self, entries):
+        rows = sorted((_require_version(low), _require_version(high), value) for low, high, value in entries)
+        self.starts = array("q", (row[0] for row in rows))
+        self.ends = array("q", (row[1] for row in rows))
+        self.values = [row[2] for row in rows]
+
+    def find(self, version):
+        """返回包含该版本的范围的序号，没有范围包含该版本或无法解析时返回 None"""
+        packed = version if isinstance(version, int) else parse_version(version)
+        if packed is None:
+            return None
+        index = bisect.bisect_right(self.starts, packed) - 1
+        if index >= 0 and packed <= self.ends[index]:
+            return index
+        return None
+
+    def lookup(self, version, default=None):
+        """返回包含该版本的范围对应的值，没有范围包含该版本或无法解析时返回 default"""
+        index = self.find(version)
+        return default if index is None else self.values[index]
+
+    def rows(self):
+        """按版本从低到高产出 (最小版本, 最大版本, 值)，版本为打包后的整数"""
+        return zip(self.starts, self.ends, self.values)
+
+    def __len__(self):
+        return len(self.values)
+
+class _Feature:
+    """按分界版本取值：低于第一个分界版本时为默认值，不低于第 i 个分界版本时为第 i 个值"""
+
+    def __init__(self, spec):
+        self.boundaries = array("q", (_require_version(boundary) for boundary in spec[1::2]))
+        self.values = [spec[0]] + spec[2::2]
+
+    def lookup(self, packed):
+        return self.values[bisect.bisect_right(self.boundaries, packed)]
+
+class VersionRegistry:
+    def __init__(self, data):
+        self.datapack_formats = RangeTable(data["datapack_formats"])
+        self.resourcepack_formats = RangeTable(data["resourcepack_formats"])
+        self.features = {name: _Feature(spec) for name, spec in data["features"].items()}
+
+    @classmethod
+    def load(cls, path=DATA_PATH):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def datapack_format(self, version):
+        """版本对应的数据包格式，表中没有的版本返回 None"""
+        return self.datapack_formats.lookup(version)
+
+    def resourcepack_format(self, version):
+        """版本对应的资源包格式，表中没有的版本返回 None"""
+        return self.resourcepack_formats.lookup(version)
+
+    def feature(self, name, version):
+        """版本对应的某项格式取值（见 version_registry.json 的 features），无法解析版本号时抛出 ValueError"""
+        try:
+            feature = self.features[name]
+        except KeyError:
+            raise KeyError(f"未知的特性：{name}，可选值为 {', '.join(self.features)}") from None
+        return feature.lookup(_require_version(version))
+
+def get_registry():
+    """返回共用的对照表，第一次调用时读取数据文件"""
+    global _registry
+    if _registry is None:
+        _registry = VersionRegistry.load()
+    return _registry
+
+def datapack_format(version):
+    return get_registry().datapack_format(version)
+
+def resourcepack_format(version):
+    return get_registry().resourcepack_format(version)
+
+def feature(name, version):
+    return get_registry().feature(name, version)
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+1. 这是一个 Python 脚本，用于为共享 saves 文件夹中的世界建立索引，列出世界并查询每个世界最后在哪个版本中游玩。
+2. 为什么要编写此脚本
+   `点击在版本隔离中共享存档.py` 把所有版本的存档集中到主目录后，saves 中会有几百个 "新的世界 [1.21.8] (2)" 这样的世界，
+   启动器每次都要完整解析所有 level.dat 才能列出它们，而且文件夹名中的版本只是移动时的来源版本，不一定是最后游玩的版本。
+3. 索引方式
+   - level.dat 通过 gzip 流式解压，只读取 Data 下的 LevelName、Version.Name、LastPlayed、GameType 四个标签，
+     不构建完整的 NBT 树，四个标签都找到后立即停止解压；
+   - 多个世界在线程池中并行读取，结果按 level.dat 的 大小 + 修改时间 缓存在 cache/世界索引.json 中，
+     未变化的世界不再打开，列出世界时只需要对每个 level.dat 执行一次 stat。
+4. 脚本使用方法
+   - python 世界索引.py list                          按最后游玩时间列出所有世界
+   - python 世界索引.py list --version 1.21.8         只列出最后在指定版本中游玩的世界
+   - python 世界索引.py list --sort name              按世界名称排序
+   - python 世界索引.py which "新的世界 [1.21.8] (2)"  查询世界最后在哪个版本中游玩
+
+@author Sakurakugu
+@date 2026-10-19
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import 共享存档配置
+import logging
+from lib.nbt import read_tags
+
+缓存文件路径 = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', '世界索引.json')
+# 需要读取的标签；1.9 之前的世界没有 Version，会读到文件末尾
+世界标签路径 = {
+    "名称": ("Data", "LevelName"),
+    "版本": ("Data", "Version", "Name"),
+    "最后游玩": ("Data", "LastPlayed"),
+    "游戏模式": ("Data", "GameType"),
+}
+游戏模式名称 = {0: "生存", 1: "创造", 2: "冒险", 3: "旁观"}
+
+# 函数：读取世界信息
+def 读取世界信息(level路径):
+    """流式解压 level.dat，只读取需要的标签"""
+    try:
+        with gzip.open(level路径, 'rb') as f:
+            标签 = read_tags(f, 世界标签路径.values())
+    except Exception as e:
+        return {"错误": str(e)}
+    return {名称: 标签.get(路径) for 名称, 路径 in 世界标签路径.items()}
+
+# 函数：更新世界索引
+def 更新世界索引(存档目录, 线程数=16):
+    """扫描存档目录，level.dat 大小和修改时间未变的世界直接使用缓存
+
+    Returns:
+        dict: {世界文件夹名: 条目}，条目包含 名称、版本、最后游玩、游戏模式 等
+    """
+    try:
+        with open(缓存文件路径, 'r', encoding='utf-8') as f:
+            缓存 = json.load(f)
+    except (FileNotFoundError, ValueError):
+        缓存 = {}
+
+    索引 = {}
+    待读取 = []
+    with os.scandir(存档目录) as it:
+        for entry in it:
+            if not entry.is_dir():
+                continue
+            level路径 = os.path.join(entry.path, "level.dat")
+            try:
+                状态 = os.stat(level路径)
+            except OSError:
+                continue
+            条目 = 缓存.get(level路径)
+            if 条目 and 条目["大小"] == 状态.st_size and 条目["mtime_ns"] == 状态.st_mtime_ns:
+                索引[level路径] = 条目
+                continue
+            条目 = {"文件夹": entry.name, "大小": 状态.st_size, "mtime_ns": 状态.st_mtime_ns}
+            索引[level路径] = 条目
+            待读取.append((level路径, 条目))
+
+    with ThreadPoolExecutor(max_workers=线程数) as 执行器:
+        for (路径, 条目), 信息 in zip(待读取, 执行器.map(lambda 项: 读取世界信息(项[0]), 待读取)):
+            条目.update(信息)
+            if "错误" in 信息:
+                logging.warning(f"读取 \"{路径}\" 失败：{信息['错误']}")
+
+    if 待读取 or len(索引) != len(缓存):
+        os.makedirs(os.path.dirname(缓存文件路径), exist_ok=True)
+        临时路径 = 缓存文件路径 + ".tmp"
+        with open(临时路径, 'w', encoding='utf-8') as f:
+            json.dump(索引, f, ensure_ascii=False)
+        os.replace(临时路径, 缓存文件路径)
+    logging.debug(f"共 {len(索引)} 个世界，重新读取 {len(待读取)} 个，其余使用缓存")
+    return {条目["文件夹"]: 条目 for 条目 in 索引.values()}
+
+# 函数：格式化世界信息
+def 格式化世界(文件夹, 条目):
+    if "错误" in 条目:
+        return f"{文件夹}  （level.dat 读取失败：{条目['错误']}）"
+    最后游玩 = 条目.get("最后游玩")
+    时间 = time.strftime('%Y-%m-%d %H:%M', time.localtime(最后游玩 / 1000)) if 最后游玩 else "-"
+    模式 = 游戏模式名称.get(条目.get("游戏模式"), "-")
+    return f"{时间}  {条目.get('版本') or '?':<12} {模式:<4} {条目.get('名称') or ''}  ({文件夹})"
+
+def main():
+    """主函数"""
+    import argparse
+
+    共享存档配置.设置日志('世界索引.log')
+    parser = argparse.ArgumentParser(description='共享存档的世界索引')
+    parser.add_argument('--config', '-c', default=共享存档配置.配置文件路径, help='配置文件路径（默认为脚本目录下的 版本隔离配置.json）')
+    parser.add_argument('--saves', help='存档目录（默认为主目录的 saves）')
+    parser.add_argument('--threads', type=int, default=16, help='并行读取的线程数')
+    子命令 = parser.add_subparsers(dest='command', required=True)
+    列出参数 = 子命令.add_parser('list', help='列出所有世界')
+    列出参数.add_argument('--version', '-v', help='只列出最后在指定版本中游玩的世界')
+    列出参数.add_argument('--sort', choices=['played', 'name'], default='played', help='排序方式（默认按最后游玩时间）')
+    查询参数 = 子命令.add_parser('which', help='查询世界最后在哪个版本中游玩')
+    查询参数.add_argument('world', help='世界文件夹名或世界名称')
+    args = parser.parse_args()
+    args.saves = args.saves or os.path.join(共享存档配置.读取配置(args.config)["MC_根目录"], "saves")
+
+    索引 = 更新世界索引(args.saves, args.threads)
+    if args.command == 'list':
+        世界列表 = [(文件夹, 条目) for 文件夹, 条目 in 索引.items() if not args.version or 条目.get("版本") == args.version]
+        if args.sort == 'name':
+            世界列表.sort(key=lambda 项: (项[1].get("名称") or 项[0]).lower())
+        else:
+            世界列表.sort(key=lambda 项: 项[1].get("最后游玩") or 0, reverse=True)
+        for 文件夹, 条目 in 世界列表:
+            logging.info(格式化世界(文件夹, 条目))
+        logging.info(f"共 {len(世界列表)} 个世界")
+    elif args.command == 'which':
+        匹配 = [(文件夹, 条目) for 文件夹, 条目 in 索引.items() if args.world in (文件夹, 条目.get("名称"))]
+        if not 匹配:
+            logging.error(f"没有找到世界 \"{args.world}\"")
+        for 文件夹, 条目 in 匹配:
+            logging.info(格式化世界(文件夹, 条目))
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        logging.info("脚本被用户中断")
+    except Exception as e:
+        logging.error(f"脚本执行时出现错误：{str(e)}")
+        import traceback
+        logging.error(traceback.format_exc())
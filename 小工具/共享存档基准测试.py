@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+"""
+1. 这是一个 Python 脚本，用于在 Linux 上对 `点击在版本隔离中共享存档.py` 进行基准测试和回归测试。
+2. 为什么要编写此脚本
+   共享存档脚本的根目录是写死的 Windows 路径，无法在其他机器上测量或验证它，
+   优化扫描、重名处理和移动逻辑时也无法比较改动前后的差异。
+3. 测试方式
+   - 在临时目录中生成合成的 .minecraft 结构：一个主目录和若干实例根目录，每个根目录有 N 个版本，
+     其中一部分含 mods，每个文件夹类型有 M 个项目；
+   - 各根目录使用相同的版本名，部分项目名称只差 " (数字)" 后缀，合并后会大量重名；
+     部分版本的文件夹已经是指向主目录的符号链接；
+   - 依次运行 发现、移动、链接 三个阶段，再在处理过的目录上完整运行一次（测量状态缓存命中时的耗时）；
+   - 每个阶段记录耗时和 os 模块的调用次数（stat、scandir、rename、symlink 等，近似系统调用次数）；
+   - 最后校验没有项目丢失、所有应处理的文件夹都已链接、含 mods 的版本未被修改。
+4. 脚本使用方法
+   - python 共享存档基准测试.py                                   使用默认规模运行一次
+   - python 共享存档基准测试.py --versions 200 --items 50 --repeat 5   更大的规模，重复 5 次取中位数
+   - python 共享存档基准测试.py --output 基准.json                    把结果写入 JSON 文件，便于在提交之间比较
+   - 校验失败时退出码为 1。
+
+@author Sakurakugu
+@date 2026-10-19
+"""
+
+import os
+import sys
+import json
+import random
+import shutil
+import platform
+import tempfile
+import threading
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import 点击在版本隔离中共享存档 as 共享存档
+import 共享存档配置
+import logging
+
+# 统计调用次数的 os 函数；os.path.exists/isdir/islink 等内部调用 os.stat/os.lstat，也会被计入
+统计的函数 = [
+    "stat", "lstat", "listdir", "scandir", "rename", "replace", "symlink",
+    "mkdir", "rmdir", "unlink", "remove", "open", "readlink",
+]
+
+# 项目名称池，用于制造重名
+世界名称 = ["新的世界", "New World", "生存", "创造测试"]
+文件扩展名 = {"saves": None, "screenshots": ".png", "schematics": ".litematic"}
+
+class 调用计数器:
+    """在 with 块内把 os 模块中的函数替换为计数的包装函数"""
+
+    def __init__(self):
+        self.计数 = Counter()
+        self.锁 = threading.Lock()
+        self.原函数 = {}
+
+    def 包装(self, 名称, 函数):
+        def 计数函数(*args, **kwargs):
+            with self.锁:
+                self.计数[名称] += 1
+            return 函数(*args, **kwargs)
+        return 计数函数
+
+    def __enter__(self):
+        for 名称 in 统计的函数:
+            self.原函数[名称] = getattr(os, 名称)
+            setattr(os, 名称, self.包装(名称, self.原函数[名称]))
+        return self
+
+    def __exit__(self, *exc):
+        for 名称, 函数 in self.原函数.items():
+            setattr(os, 名称, 函数)
+        self.原函数.clear()
+
+# 函数：生成一个项目
+def 生成项目(文件夹路径, 类型, 名称):
+    """saves 中的项目为带 level.dat 的世界文件夹，其他类型为小文件"""
+    if 类型 == "saves":
+        世界路径 = os.path.join(文件夹路径, 名称)
+        os.makedirs(os.path.join(世界路径, "region"))
+        with open(os.path.join(世界路径, "level.dat"), 'wb') as f:
+            f.write(os.urandom(64))
+        with open(os.path.join(世界路径, "region", "r.0.0.mca"), 'wb') as f:
+            f.write(b"\0" * 8192)
+    else:
+        with open(os.path.join(文件夹路径, 名称 + 文件扩展名.get(类型, ".zip")), 'wb') as f:
+            f.write(os.urandom(256))
+
+# 函数：生成一个文件夹类型下的项目
+def 生成文件夹(文件夹路径, 类型, 项目数, 重名比例, 随机):
+    """重名的项目使用名称池中的名称加不同的 " (数字)" 后缀，移动时去掉后缀后会互相重名"""
+    os.makedirs(文件夹路径, exist_ok=True)
+    for i in range(项目数):
+        if 随机.random() < 重名比例:
+            名称 = f"{随机.choice(世界名称)} ({i})" if i else 随机.choice(世界名称)
+        else:
+            名称 = f"项目{i:05d}"
+        生成项目(文件夹路径, 类型, 名称)
+
+# 函数：生成合成的 .minecraft 结构
+def 生成目录结构(基础目录, 参数, 随机):
+    """返回 (根目录列表, 预期情况)，预期情况用于运行后的校验"""
+    类型列表 = 共享存档.要链接的文件夹
+    根目录列表 = [os.path.join(基础目录, ".minecraft")] + [
+        os.path.join(基础目录, f"实例{i}", ".minecraft") for i in range(参数.instances)
+    ]
+    主目录 = 根目录列表[0]
+    预期 = {"共享项目数": Counter(), "链接": [], "含mod": []}
+
+    # 主目录中原有的共享项目
+    for 类型 in 类型列表:
+        生成文件夹(os.path.join(主目录, 类型), 类型, 参数.items, 参数.collision_ratio, 随机)
+        预期["共享项目数"][类型] += 参数.items
+
+    for 根目录 in 根目录列表:
+        if 根目录 != 主目录:
+            # 实例根目录本身也有各文件夹类型
+            for 类型 in 类型列表:
+                生成文件夹(os.path.join(根目录, 类型), 类型, 参数.items, 参数.collision_ratio, 随机)
+                预期["共享项目数"][类型] += 参数.items
+            预期["链接"].append(根目录)
+        # 各根目录使用相同的版本名，合并后版本后缀也会重名
+        for i in range(参数.versions):
+            版本路径 = os.path.join(根目录, "versions", f"1.{i // 10 + 12}.{i % 10}")
+            os.makedirs(版本路径)
+            if 随机.random() < 参数.mod_ratio:
+                os.makedirs(os.path.join(版本路径, "mods"))
+                生成文件夹(os.path.join(版本路径, "saves"), "saves", 参数.items, 参数.collision_ratio, 随机)
+                预期["含mod"].append(版本路径)
+                continue
+            已链接 = 随机.random() < 参数.linked_ratio
+            for 类型 in 类型列表:
+                文件夹路径 = os.path.join(版本路径, 类型)
+                if 已链接:
+                    os.symlink(os.path.join(主目录, 类型), 文件夹路径)
+                elif 随机.random() < 0.8:
+                    # 剩余的文件夹不存在，由脚本创建链接
+                    生成文件夹(文件夹路径, 类型, 参数.items, 参数.collision_ratio, 随机)
+                    预期["共享项目数"][类型] += 参数.items
+            预期["链接"].append(版本路径)
+    return 根目录列表, 预期
+
+# 函数：配置共享存档脚本
+def 配置共享存档(根目录列表, 状态文件路径, 参数):
+    """把共享存档脚本的全局变量指向合成目录，关闭索引更新和mod扫描以只测量核心阶段"""
+    共享存档.MC_根目录 = 根目录列表[0]
+    共享存档.实例根目录 = 根目录列表[1:]
+    共享存档.含mod但也处理的存档目录 = []
+    共享存档.状态文件路径 = 状态文件路径
+    共享存档.全量扫描 = False
+    共享存档.更新共享文件夹索引 = False
+    共享存档.扫描跳过版本的模组 = False
+    共享存档.目录状态 = {}
+    共享存档.最大线程数 = 参数.threads
+    共享存档.已预留路径.clear()
+
+# 函数：计时并计数地运行一个阶段
+def 测量阶段(函数):
+    with 调用计数器() as 计数器:
+        开始时间 = time.perf_counter()
+        结果 = 函数()
+        耗时 = time.perf_counter() - 开始时间
+    return 结果, {"耗时": 耗时, "调用": dict(sorted(计数器.计数.items()))}
+
+# 函数：移动阶段
+def 移动所有目录(待处理的目录, 线程数):
+    """与脚本相同，多个目录在线程池中同时向主目录移动；返回移动的文件夹数"""
+    def 移动一个目录(目录):
+        版本名字 = "" if 目录 in 共享存档.获取根目录列表() else os.path.basename(目录)
+        数量 = 0
+        for 类型 in 共享存档.要链接的文件夹:
+            源路径 = os.path.join(目录, 类型)
+            if os.path.exists(源路径) and not 共享存档.isLink(源路径):
+                共享存档.移动文件夹内容(源路径, os.path.join(共享存档.MC_根目录, 类型), 版本名字)
+                数量 += 1
+        return 数量
+    with ThreadPoolExecutor(max_workers=线程数) as 执行器:
+        return sum(执行器.map(移动一个目录, 待处理的目录))
+
+# 函数：链接阶段
+def 链接所有目录(待处理的目录):
+    for 目录 in 待处理的目录:
+        for 类型 in 共享存档.要链接的文件夹:
+            共享存档.创建软链接(os.path.join(目录, 类型), os.path.join(共享存档.MC_根目录, 类型))
+        共享存档.记录目录状态(目录)
+    return len(待处理的目录)
+
+# 函数：校验结果
+def 校验结果(根目录列表, 预期):
+    问题 = []
+    主目录 = 根目录列表[0]
+    for 类型, 数量 in 预期["共享项目数"].items():
+        实际数量 = len(os.listdir(os.path.join(主目录, 类型)))
+        if 实际数量 != 数量:
+            问题.append(f"{类型}：预期 {数量} 个项目，实际 {实际数量} 个")
+    for 目录 in 预期["链接"]:
+        for 类型 in 共享存档.要链接的文件夹:
+            路径 = os.path.join(目录, 类型)
+            if not os.path.islink(路径) or os.path.realpath(路径) != os.path.realpath(os.path.join(主目录, 类型)):
+                问题.append(f"\"{路径}\" 没有链接到主目录")
+    for 目录 in 预期["含mod"]:
+        if os.path.islink(os.path.join(目录, "saves")):
+            问题.append(f"含 mods 的版本 \"{目录}\" 被修改")
+    return 问题
+
+# 函数：运行一次基准测试
+def 运行一次(参数, 随机):
+    基础目录 = tempfile.mkdtemp(prefix="共享存档基准_", dir=参数.dir)
+    try:
+        根目录列表, 预期 = 生成目录结构(基础目录, 参数, 随机)
+        配置共享存档(根目录列表, os.path.join(基础目录, "状态.json"), 参数)
+        阶段 = {}
+
+        结果, 阶段["发现"] = 测量阶段(lambda: [共享存档.发现待处理的目录(根目录) for 根目录 in 根目录列表])
+        待处理的目录 = [目录 for 目录列表, _ in 结果 for 目录 in 目录列表]
+        阶段["发现"]["目录数"] = len(待处理的目录)
+
+        阶段["移动"] = 测量阶段(lambda: 移动所有目录(待处理的目录, 参数.threads))[1]
+        阶段["链接"] = 测量阶段(lambda: 链接所有目录(待处理的目录))[1]
+        共享存档.保存状态()
+
+        # 目录均未变化，测量状态缓存命中时完整运行一次的耗时
+        阶段["重新运行"] = 测量阶段(共享存档.main)[1]
+
+        问题 = 校验结果(根目录列表, 预期)
+        return {"阶段": 阶段, "问题": 问题}
+    finally:
+        if 参数.keep:
+            logging.info(f"已保留测试目录 \"{基础目录}\"")
+        else:
+            shutil.rmtree(基础目录, ignore_errors=True)
+
+# 函数：汇总多次运行的结果
+def 汇总结果(结果列表):
+    """耗时取中位数；调用次数对相同的输入是确定的，取第一次的值"""
+    汇总 = {}
+    for 名称, 第一次 in 结果列表[0]["阶段"].items():
+        耗时列表 = [结果["阶段"][名称]["耗时"] for 结果 in 结果列表]
+        汇总[名称] = dict(第一次, 耗时=statistics.median(耗时列表), 耗时列表=耗时列表)
+    return 汇总
+
+def main():
+    """主函数"""
+    import argparse
+
+    共享存档配置.设置日志('共享存档基准测试.log')
+    parser = argparse.ArgumentParser(description='共享存档脚本的基准测试和回归测试')
+    parser.add_argument('--config', '-c', default=共享存档配置.配置文件路径, help='配置文件路径，只使用其中的文件夹类型和线程数（根目录总是合成目录）')
+    parser.add_argument('--versions', type=int, default=40, help='每个根目录的版本数（默认 40）')
+    parser.add_argument('--instances', type=int, default=1, help='主目录之外的实例根目录数（默认 1）')
+    parser.add_argument('--items', type=int, default=20, help='每个文件夹类型的项目数（默认 20）')
+    parser.add_argument('--mod-ratio', type=float, default=0.3, help='含 mods 的版本比例（默认 0.3）')
+    parser.add_argument('--linked-ratio', type=float, default=0.2, help='文件夹已是符号链接的版本比例（默认 0.2）')
+    parser.add_argument('--collision-ratio', type=float, default=0.5, help='会互相重名的项目比例（默认 0.5）')
+    parser.add_argument('--threads', type=int, help='线程池大小（默认为配置中的最大线程数）')
+    parser.add_argument('--repeat', type=int, default=1, help='重复运行的次数，耗时取中位数')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子，相同的种子生成相同的目录结构')
+    parser.add_argument('--dir', help='生成临时目录的位置（默认为系统临时目录）')
+    parser.add_argument('--keep', action='store_true', help='保留生成的目录以便检查')
+    parser.add_argument('--output', '-o', help='把 JSON 结果写入文件（默认输出到标准输出）')
+    parser.add_argument('--verbose', action='store_true', help='保留共享存档脚本的逐项日志（会计入耗时）')
+    args = parser.parse_args()
+    共享存档.加载配置(args.config)
+    args.threads = args.threads or 共享存档.最大线程数
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    结果列表 = [运行一次(args, random.Random(args.seed)) for _ in range(args.repeat)]
+    问题 = sorted({问题 for 结果 in 结果列表 for 问题 in 结果["问题"]})
+    输出 = {
+        "参数": {
+            键: getattr(args, 键)
+            for 键 in ("versions", "instances", "items", "mod_ratio", "linked_ratio", "collision_ratio", "threads", "repeat", "seed")
+        },
+        "环境": {"python": platform.python_version(), "系统": platform.platform(), "文件夹类型": 共享存档.要链接的文件夹},
+        "阶段": 汇总结果(结果列表),
+        "校验": {"通过": not 问题, "问题": 问题},
+    }
+
+    文本 = json.dumps(输出, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(文本)
+    else:
+        print(文本)
+    if 问题:
+        for 内容 in 问题:
+            logging.error(内容)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        logging.info("脚本被用户中断")
+    except Exception as e:
+        logging.error(f"脚本执行时出现错误：{str(e)}")
+        import traceback
+        logging.error(traceback.format_exc())
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+1. 这是 `点击在版本隔离中共享存档.py` 和其他小工具共用的配置模块：默认配置、读取 `版本隔离配置.json`、设置各工具自己的日志。
+2. 为什么要单独成为一个模块
+   以前其他小工具为了拿到主目录等配置，需要导入 `点击在版本隔离中共享存档.py`，而导入它会配置写入 版本隔离.log 的异步日志，
+   备份、精简、索引等工具的输出因此都混进了共享存档脚本的日志。本模块导入时没有任何副作用，不配置日志、不导入其他工具。
+3. 使用方法
+   - 编辑本文件中的 `MC_根目录`、`含mod但也处理的存档目录` 等默认值，或复制 `版本隔离配置.示例.json` 为 `版本隔离配置.json` 填写；
+   - 小工具中：
+         import 共享存档配置
+         共享存档配置.设置日志('世界索引.log')
+         配置 = 共享存档配置.读取配置(args.config)
+         配置["MC_根目录"]
+
+@author Sakurakugu
+@date 2026-10-19
+"""
+
+import os
+import sys
+import json
+
+脚本目录 = os.path.dirname(os.path.abspath(__file__))
+仓库根目录 = os.path.dirname(脚本目录)
+配置文件路径 = os.path.join(脚本目录, '版本隔离配置.json')
+日志目录 = os.path.join(脚本目录, 'log')
+
+# 设置主目录
+MC_根目录 = "D:\\Software\\Games\\我的世界\\.minecraft"
+官方MC_根目录 = os.path.join(os.environ.get('APPDATA', ''), '.minecraft')
+# 其他启动器实例的根目录，它们的资源文件夹都会合并并链接到主目录
+实例根目录 = [官方MC_根目录]
+含mod但也处理的存档目录 = [
+    "1.21.9",
+    "1.21.10 原版"
+]
+要链接的文件夹 = [
+    "resourcepacks",  # 资源包
+    "shaderpacks",    # 光影
+    "backups",        # 备份
+    "saves",          # 存档
+    "schematics",     # 投影mod
+    "screenshots"     # 截图
+]
+# 并发设置：线程池大小，以及同一个根目录下同时处理的目录数
+最大线程数 = 8
+每个根目录并发数 = 4
+
+配置项 = ("MC_根目录", "实例根目录", "含mod但也处理的存档目录", "要链接的文件夹", "最大线程数", "每个根目录并发数")
+# 必须为不小于 1 的整数的配置项：为 0 时 asyncio.Semaphore(0) 会让处理永远等待
+正整数配置项 = ("最大线程数", "每个根目录并发数")
+
+# 函数：读取配置
+def 读取配置(配置路径=配置文件路径):
+    """返回 {配置项: 值}，配置文件中没有的项使用本模块中的默认值；文件不存在时全部使用默认值
+
+    线程数等配置项不是不小于 1 的整数时抛出 ValueError。
+    """
+    配置 = {名称: globals()[名称] for 名称 in 配置项}
+    if os.path.exists(配置路径):
+        with open(配置路径, 'r', encoding='utf-8') as f:
+            配置.update((名称, 值) for 名称, 值 in json.load(f).items() if 名称 in 配置项)
+    for 名称 in 正整数配置项:
+        值 = 配置[名称]
+        if isinstance(值, bool) or not isinstance(值, int) or 值 < 1:
+            raise ValueError(f"配置文件 \"{配置路径}\" 中的 {名称} 应为不小于 1 的整数，当前为 {值!r}")
+    return 配置
+
+# 函数：获取所有根目录
+def 获取根目录列表(配置):
+    """主目录在前，其后是去重后的实例根目录"""
+    根目录列表 = [配置["MC_根目录"]]
+    for 根目录 in 配置["实例根目录"]:
+        if 根目录 and 根目录 not in 根目录列表:
+            根目录列表.append(根目录)
+    return 根目录列表
+
+# 函数：设置日志
+def 设置日志(日志文件名, **参数):
+    """把日志写入 小工具/log/<日志文件名>，控制台只显示信息及以上级别；参数会传给 lib.log.configure
+
+    没有 lib/log.py（单独复制小工具目录）时退回到 logging.basicConfig。
+    """
+    if 仓库根目录 not in sys.path:
+        sys.path.insert(0, 仓库根目录)
+    日志路径 = os.path.join(日志目录, 日志文件名)
+    try:
+        from lib.log import logging, configure
+    except ImportError:
+        import logging
+        os.makedirs(日志目录, exist_ok=True)
+        logging.basicConfig(
+            level="DEBUG",
+            handlers=[
+                logging.StreamHandler(),
+                logging.FileHandler(日志路径, encoding='utf-8')
+            ],
+            format='%(asctime)s - %(levelname)-8s - %(lineno)-3d - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
+        return
+    configure(path=日志路径, **{"console_level": logging.INFO, **参数})
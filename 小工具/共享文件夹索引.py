@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""
+1. 这是一个 Python 脚本，用于为主目录中共享的文件夹（saves、screenshots、resourcepacks 等）建立 SQLite 索引。
+2. 为什么要编写此脚本
+   `点击在版本隔离中共享存档.py` 把所有版本的资源合并到了主目录，这些文件夹里动辄上万个项目，
+   想找最大的存档、某个版本来的截图或者重复的资源包，只能一个个目录翻。
+3. 索引内容
+   - 每个文件夹类型下的每个项目：路径、大小（文件夹为总大小）、修改时间、来源版本（从 " [版本名]" 后缀解析）；
+   - 可选的内容哈希（--hash），用于查找重复项目；
+   - 每次运行只重新计算修改时间发生变化的项目，`点击在版本隔离中共享存档.py` 每次运行结束后也会自动更新索引。
+     文件夹的修改时间取文件夹本身及其直接子项中最新的一个：存档每次保存都会重写 level.dat，因此能被发现；
+     只修改了更深层的文件（如解压后的资源包中的贴图）时不会被发现，需要用 update --full 重新统计。
+   - 无法读取的项目（如指向已删除目标的符号链接）会被跳过，不会中断更新。
+4. 脚本使用方法
+   - python 共享文件夹索引.py update [--hash] [--full]   更新索引
+   - python 共享文件夹索引.py largest [-n 20] [--kind saves]  列出最大的项目
+   - python 共享文件夹索引.py version 1.21.8             列出来自某个版本的项目
+   - python 共享文件夹索引.py duplicates                 列出内容相同的项目（需要先用 --hash 更新）
+   - python 共享文件夹索引.py stats                      按文件夹类型和版本统计
+
+@author Sakurakugu
+@date 2026-10-19
+"""
+
+import os
+import re
+import hashlib
+import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+索引文件路径 = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', '共享文件夹索引.db')
+
+建表语句 = """
+CREATE TABLE IF NOT EXISTS items (
+    path TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    is_dir INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    version TEXT,
+    hash TEXT
+);
+CREATE INDEX IF NOT EXISTS items_kind ON items(kind);
+CREATE INDEX IF NOT EXISTS items_size ON items(size DESC);
+CREATE INDEX IF NOT EXISTS items_version ON items(version);
+CREATE INDEX IF NOT EXISTS items_hash ON items(hash, size) WHERE hash IS NOT NULL;
+"""
+
+# 函数：打开索引数据库
+def 打开索引(路径=None):
+    路径 = 路径 or 索引文件路径
+    os.makedirs(os.path.dirname(路径), exist_ok=True)
+    连接 = sqlite3.connect(路径)
+    连接.execute("PRAGMA journal_mode=WAL")
+    连接.executescript(建表语句)
+    return 连接
+
+# 函数：解析来源版本
+def 解析来源版本(名称, 是目录):
+    """从 "名称 [版本名] (数字)" 形式的名称中取出版本名，与移动时添加后缀的规则一致"""
+    if not 是目录:
+        名称 = os.path.splitext(名称)[0]
+    名称 = re.sub(r'\s\(\d+\)$', '', 名称)
+    匹配 = re.search(r'\s\[([^\[\]]+)\]$', 名称)
+    return 匹配.group(1) if 匹配 else None
+
+# 函数：计算文件哈希
+def 计算文件哈希(路径):
+    哈希 = hashlib.blake2b(digest_size=20)
+    with open(路径, 'rb') as f:
+        for 块 in iter(lambda: f.read(1024 * 1024), b""):
+            哈希.update(块)
+    return 哈希.hexdigest()
+
+# 函数：统计文件夹
+def 统计文件夹(路径, 计算哈希):
+    """返回 (总大小, 哈希)；文件夹的哈希由按相对路径排序的每个文件的哈希组合而成"""
+    总大小 = 0
+    文件列表 = []
+    for 当前目录, 子目录, 文件名列表 in os.walk(路径):
+        子目录.sort()
+        for 文件名 in sorted(文件名列表):
+            文件路径 = os.path.join(当前目录, 文件名)
+            try:
+                总大小 += os.path.getsize(文件路径)
+            except OSError:
+                continue
+            文件列表.append(文件路径)
+    if not 计算哈希:
+        return 总大小, None
+    哈希 = hashlib.blake2b(digest_size=20)
+    for 文件路径 in 文件列表:
+        哈希.update(os.path.relpath(文件路径, 路径).replace(os.sep, "/").encode("utf-8"))
+        哈希.update(计算文件哈希(文件路径).encode("ascii"))
+    return 总大小, 哈希.hexdigest()
+
+# 函数：读取项目的修改时间
+def 读取修改时间(entry):
+    """文件返回自身的修改时间；文件夹返回文件夹本身及其直接子项中最新的修改时间
+
+    在文件夹中修改已有文件不会改变文件夹本身的修改时间，只看文件夹本身会漏掉存档的每次保存（会重写 level.dat）。
+    无法读取时（如指向已删除目标的符号链接）抛出 OSError。
+    """
+    修改时间 = entry.stat().st_mtime_ns
+    if entry.is_dir():
+        with os.scandir(entry.path) as it:
+            for 子项 in it:
+                try:
+                    修改时间 = max(修改时间, 子项.stat(follow_symlinks=False).st_mtime_ns)
+                except OSError:
+                    continue
+    return 修改时间
+
+# 函数：计算单个项目的记录
+def 生成记录(类型, entry, 修改时间, 计算哈希):
+    """返回要写入 items 表的一行；统计过程中项目被删除或无法读取时返回 None"""
+    try:
+        是目录 = entry.is_dir()
+        if 是目录:
+            大小, 哈希 = 统计文件夹(entry.path, 计算哈希)
+        else:
+            大小 = entry.stat().st_size
+            哈希 = 计算文件哈希(entry.path) if 计算哈希 else None
+    except OSError as e:
+        logging.warning(f"统计 \"{entry.path}\" 失败，已跳过：{str(e)}")
+        return None
+    return (entry.path, 类型, entry.name, int(是目录), 大小, 修改时间, 解析来源版本(entry.name, 是目录), 哈希)
+
+# 函数：更新索引
+def 更新索引(MC_根目录, 要链接的文件夹, 计算哈希=False, 线程数=8, 索引路径=None, 全量=False):
+    """按修改时间增量更新索引，只重新统计新增或修改过的项目（全量为 True 时重新统计所有项目）
+
+    Returns:
+        tuple: (项目总数, 重新统计的项目数, 删除的项目数)
+    """
+    连接 = 打开索引(索引路径)
+    总数 = 更新数 = 删除数 = 0
+    try:
+        with ThreadPoolExecutor(max_workers=线程数) as 执行器, 连接:
+            for 类型 in 要链接的文件夹:
+                文件夹路径 = os.path.join(MC_根目录, 类型)
+                已有记录 = {
+                    路径: (mtime_ns, 哈希)
+                    for 路径, mtime_ns, 哈希 in 连接.execute("SELECT path, mtime_ns, hash FROM items WHERE kind = ?", (类型,))
+                }
+                待更新 = []
+                if os.path.isdir(文件夹路径):
+                    with os.scandir(文件夹路径) as it:
+                        for entry in it:
+                            try:
+                                修改时间 = 读取修改时间(entry)
+                            except OSError as e:
+                                # 无法读取的项目不计入索引，已有的记录随后会被删除
+                                logging.debug(f"跳过无法读取的项目 \"{entry.path}\"：{str(e)}")
+                                continue
+                            总数 += 1
+                            上次 = 已有记录.pop(entry.path, None)
+                            if not 全量 and 上次 and 上次[0] == 修改时间 and (上次[1] or not 计算哈希):
+                                continue
+                            待更新.append((entry, 修改时间))
+                记录列表 = [
+                    记录 for 记录 in 执行器.map(lambda 项: 生成记录(类型, 项[0], 项[1], 计算哈希), 待更新)
+                    if 记录 is not None
+                ]
+                连接.executemany("INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?, ?, ?, ?)", 记录列表)
+                连接.executemany("DELETE FROM items WHERE path = ?", ((路径,) for 路径 in 已有记录))
+                更新数 += len(记录列表)
+                删除数 += len(已有记录)
+    finally:
+        连接.close()
+    logging.info(f"共享文件夹索引已更新：共 {总数} 个项目，重新统计 {更新数} 个，删除 {删除数} 个")
+    return 总数, 更新数, 删除数
+
+# 函数：查询最大的项目
+def 查询最大项目(连接, 数量=20, 类型=None):
+    if 类型:
+        return 连接.execute(
+            "SELECT path, size, version FROM items WHERE kind = ? ORDER BY size DESC LIMIT ?", (类型, 数量)
+        ).fetchall()
+    return 连接.execute("SELECT path, size, version FROM items ORDER BY size DESC LIMIT ?", (数量,)).fetchall()
+
+# 函数：查询某个版本的项目
+def 查询版本项目(连接, 版本):
+    return 连接.execute("SELECT path, size, kind FROM items WHERE version = ? ORDER BY kind, name", (版本,)).fetchall()
+
+# 函数：查询重复项目
+def 查询重复项目(连接):
+    """返回 [(大小, [路径, ...]), ...]，按可节省的空间从大到小排序"""
+    结果 = 连接.execute(
+        "SELECT size, group_concat(path, char(10)) FROM items WHERE hash IS NOT NULL "
+        "GROUP BY hash, size HAVING COUNT(*) > 1 ORDER BY size * (COUNT(*) - 1) DESC"
+    ).fetchall()
+    return [(大小, 路径.split("\n")) for 大小, 路径 in 结果]
+
+# 函数：统计
+def 查询统计(连接):
+    按类型 = 连接.execute("SELECT kind, COUNT(*), SUM(size) FROM items GROUP BY kind ORDER BY kind").fetchall()
+    按版本 = 连接.execute(
+        "SELECT IFNULL(version, '(无)'), COUNT(*), SUM(size) FROM items GROUP BY version ORDER BY SUM(size) DESC"
+    ).fetchall()
+    return 按类型, 按版本
+
+def main():
+    """主函数"""
+    import argparse
+    import 共享存档配置
+
+    共享存档配置.设置日志('共享文件夹索引.log')
+    parser = argparse.ArgumentParser(description='共享文件夹 SQLite 索引')
+    parser.add_argument('--config', '-c', default=共享存档配置.配置文件路径, help='配置文件路径（默认为脚本目录下的 版本隔离配置.json）')
+    子命令 = parser.add_subparsers(dest='command', required=True)
+    更新参数 = 子命令.add_parser('update', help='增量更新索引')
+    更新参数.add_argument('--hash', action='store_true', help='同时计算内容哈希，用于查找重复项目')
+    更新参数.add_argument('--full', action='store_true', help='忽略修改时间，重新统计所有项目')
+    最大参数 = 子命令.add_parser('largest', help='列出最大的项目')
+    最大参数.add_argument('-n', type=int, default=20, help='列出的数量')
+    最大参数.add_argument('--kind', help='只列出某个文件夹类型，如 saves')
+    版本参数 = 子命令.add_parser('version', help='列出来自某个版本的项目')
+    版本参数.add_argument('version', help='版本名，即项目名称中 [ ] 内的部分')
+    子命令.add_parser('duplicates', help='列出内容相同的项目')
+    子命令.add_parser('stats', help='按文件夹类型和版本统计')
+    args = parser.parse_args()
+
+    if args.command == 'update':
+        配置 = 共享存档配置.读取配置(args.config)
+        更新索引(配置["MC_根目录"], 配置["要链接的文件夹"], args.hash, 全量=args.full)
+        return
+
+    连接 = 打开索引()
+    try:
+        if args.command == 'largest':
+            for 路径, 大小, 版本 in 查询最大项目(连接, args.n, args.kind):
+                logging.info(f"{大小:>15,} 字节  [{版本 or '-'}]  {路径}")
+        elif args.command == 'version':
+            结果 = 查询版本项目(连接, args.version)
+            for 路径, 大小, 类型 in 结果:
+                logging.info(f"{类型:<14} {大小:>15,} 字节  {路径}")
+            logging.info(f"共 {len(结果)} 个项目来自版本 {args.version}")
+        elif args.command == 'duplicates':
+            结果 = 查询重复项目(连接)
+            if not 结果 and not 连接.execute("SELECT 1 FROM items WHERE hash IS NOT NULL LIMIT 1").fetchone():
+                logging.warning("索引中没有内容哈希，请先运行 update --hash")
+            for 大小, 路径列表 in 结果:
+                logging.info(f"{len(路径列表)} 个相同项目，每个 {大小:,} 字节：\n  " + "\n  ".join(路径列表))
+        elif args.command == 'stats':
+            按类型, 按版本 = 查询统计(连接)
+            for 类型, 数量, 大小 in 按类型:
+                logging.info(f"{类型:<14} {数量:>7} 个  {大小 or 0:>15,} 字节")
+            for 版本, 数量, 大小 in 按版本:
+                logging.info(f"{版本:<20} {数量:>7} 个  {大小 or 0:>15,} 字节")
+    finally:
+        连接.close()
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        logging.info("脚本被用户中断")
+    except Exception as e:
+        logging.error(f"脚本执行时出现错误：{str(e)}")
+        import traceback
+        logging.error(traceback.format_exc())
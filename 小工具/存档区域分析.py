@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+1. 这是一个 Python 脚本，用于分析和精简共享 saves 文件夹中的世界。
+2. 为什么要编写此脚本
+   所有版本的存档集中到主目录的 saves 后，世界只会越来越大，移动和备份都会越来越慢。
+   而世界里有大量区块只是被跑图生成过一次，之后再也没有人去过。
+3. 分析方式
+   - 每个区域文件（.mca）通过内存映射只读取前 8 KiB 的位置表和时间戳表，不读取区块数据；
+   - 统计每个世界的大小、区块数，以及超过指定天数没有再保存过的区块（即生成后没有再访问的区块）；
+   - 区域文件按线程池并行扫描。
+4. 精简方式（--trim）
+   - 逐个解压区块，只读取 InhabitedTime 和 Status 两个标签，读到后立即停止解压；
+   - 删除没有生成完成的区块，以及 InhabitedTime 不超过 --max-inhabited 刻的区块，
+     同时删除 entities 和 poi 中对应的区块，然后紧凑地重写区域文件；
+   - 被删除的区块在下次进入时会重新生成。精简前请关闭游戏，建议先用 --dry-run 预览，并先备份。
+5. 脚本使用方法
+   - python 存档区域分析.py                                 分析所有世界
+   - python 存档区域分析.py --world "新的世界 [1.21.8]"      只分析指定世界
+   - python 存档区域分析.py --trim --dry-run                预览精简结果
+   - python 存档区域分析.py --trim --max-inhabited 1200     删除停留不超过 1 分钟的区块
+
+@author Sakurakugu
+@date 2026-10-19
+"""
+
+import os
+import sys
+import mmap
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import 共享存档配置
+import logging
+from lib.nbt import read_tags
+from lib.region import HEADER_SIZE, SECTOR_SIZE, iter_chunks, is_external, open_chunk, parse_header, write_region
+
+# 1.18 起区块标签位于根标签下，之前位于 Level 下
+区块标签路径 = [("InhabitedTime",), ("Status",), ("Level", "InhabitedTime"), ("Level", "Status")]
+
+# 函数：读取区块标签
+def 读取区块标签(标签, 名称):
+    return 标签.get((名称,), 标签.get(("Level", 名称)))
+
+# 函数：查找世界中的区域文件
+def 查找区域文件(世界路径):
+    """返回 (世界总大小, 各维度 region 目录中的 .mca 文件列表)"""
+    总大小 = 0
+    区域文件列表 = []
+    for 当前目录, _, 文件列表 in os.walk(世界路径):
+        是区域目录 = os.path.basename(当前目录) == "region"
+        for 文件名 in 文件列表:
+            路径 = os.path.join(当前目录, 文件名)
+            try:
+                总大小 += os.path.getsize(路径)
+            except OSError:
+                continue
+            if 是区域目录 and 文件名.endswith(".mca"):
+                区域文件列表.append(路径)
+    return 总大小, 区域文件列表
+
+# 函数：分析单个区域文件
+def 分析区域文件(路径, 过期时间):
+    """只映射并读取 8 KiB 头部"""
+    结果 = {"区块": 0, "未再访问": 0, "已用扇区": 2, "文件扇区": 0}
+    with open(路径, 'rb') as f:
+        大小 = os.fstat(f.fileno()).st_size
+        结果["文件扇区"] = -(-大小 // SECTOR_SIZE)
+        if 大小 < HEADER_SIZE:
+            return 结果
+        with mmap.mmap(f.fileno(), HEADER_SIZE, access=mmap.ACCESS_READ) as 映射:
+            位置表, 时间戳表 = parse_header(映射)
+    for (偏移, 扇区数), 时间戳 in zip(位置表, 时间戳表):
+        if 偏移 == 0 and 扇区数 == 0:
+            continue
+        结果["区块"] += 1
+        结果["已用扇区"] += 扇区数
+        if 时间戳 < 过期时间:
+            结果["未再访问"] += 1
+    return 结果
+
+# 函数：判断区块是否应被删除
+def 应删除区块(区块数据, 最大停留刻数):
+    """没有生成完成或 InhabitedTime 不超过阈值的区块应被删除，外部存储的区块一律保留"""
+    if is_external(区块数据):
+        return False
+    标签 = read_tags(
+        open_chunk(区块数据), 区块标签路径,
+        stop_when=lambda 结果: 读取区块标签(结果, "InhabitedTime") is not None and 读取区块标签(结果, "Status") is not None
+    )
+    状态 = 读取区块标签(标签, "Status")
+    if 状态 is not None and 状态.split(":")[-1] != "full":
+        return True
+    停留刻数 = 读取区块标签(标签, "InhabitedTime")
+    return 停留刻数 is not None and 停留刻数 <= 最大停留刻数
+
+# 函数：重写区域文件，删除指定区块
+def 删除区域文件中的区块(路径, 删除索引, 保留区块=None):
+    """保留区块为 None 时从文件中读取；所有区块都被删除时删除整个文件
+
+    Returns:
+        int: 节省的字节数
+    """
+    原大小 = os.path.getsize(路径)
+    if 保留区块 is None:
+        with open(路径, 'rb') as f:
+            数据 = f.read()
+        保留区块 = []
+        for 索引, _, _, 时间戳, 区块数据 in iter_chunks(数据):
+            if 索引 in 删除索引:
+                continue
+            if 区块数据 is None:
+                logging.warning(f"区域文件 \"{路径}\" 中有损坏的区块，不做修改")
+                return 0
+            保留区块.append((索引, 时间戳, 区块数据))
+    if 保留区块:
+        write_region(路径, 保留区块)
+        return 原大小 - os.path.getsize(路径)
+    os.remove(路径)
+    return 原大小
+
+# 函数：精简单个区域文件
+def 精简区域文件(路径, 最大停留刻数, 仅预览):
+    """Returns: (删除的区块数, 节省的字节数)"""
+    保留区块 = []
+    删除索引 = set()
+    with open(路径, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < HEADER_SIZE:
+            return 0, 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as 映射:
+            for 索引, _, _, 时间戳, 区块数据 in iter_chunks(映射):
+                if 区块数据 is None:
+                    logging.warning(f"区域文件 \"{路径}\" 中有损坏的区块，跳过")
+                    return 0, 0
+                try:
+                    删除 = 应删除区块(区块数据, 最大停留刻数)
+                except Exception as e:
+                    logging.warning(f"读取 \"{路径}\" 的区块 {索引} 失败，保留该区块：{str(e)}")
+                    删除 = False
+                if 删除:
+                    删除索引.add(索引)
+                else:
+                    保留区块.append((索引, 时间戳, 区块数据))
+    if not 删除索引 or 仅预览:
+        return len(删除索引), 0
+
+    节省字节 = 删除区域文件中的区块(路径, 删除索引, 保留区块)
+    # 同步删除实体和兴趣点中对应的区块
+    维度目录 = os.path.dirname(os.path.dirname(路径))
+    for 子目录 in ("entities", "poi"):
+        对应路径 = os.path.join(维度目录, 子目录, os.path.basename(路径))
+        if os.path.exists(对应路径) and os.path.getsize(对应路径) >= HEADER_SIZE:
+            节省字节 += 删除区域文件中的区块(对应路径, 删除索引)
+    return len(删除索引), 节省字节
+
+# 函数：分析所有世界
+def 分析世界(存档目录, 世界列表, 过期天数, 线程数):
+    过期时间 = time.time() - 过期天数 * 86400
+    with ThreadPoolExecutor(max_workers=线程数) as 执行器:
+        for 世界 in 世界列表:
+            总大小, 区域文件列表 = 查找区域文件(os.path.join(存档目录, 世界))
+            结果列表 = list(执行器.map(lambda 路径: 分析区域文件(路径, 过期时间), 区域文件列表))
+            区块数 = sum(r["区块"] for r in 结果列表)
+            未再访问 = sum(r["未再访问"] for r in 结果列表)
+            空闲字节 = sum(r["文件扇区"] - r["已用扇区"] for r in 结果列表) * SECTOR_SIZE
+            占比 = 未再访问 / 区块数 * 100 if 区块数 else 0
+            logging.info(
+                f"{世界}：{总大小 / 1024 / 1024:,.1f} MiB，{len(区域文件列表)} 个区域文件，{区块数} 个区块，"
+                f"{未再访问} 个区块超过 {过期天数} 天未再访问（{占比:.1f}%），区域文件中有 {max(空闲字节, 0):,} 字节空闲扇区"
+            )
+
+# 函数：精简所有世界
+def 精简世界(存档目录, 世界列表, 最大停留刻数, 仅预览, 线程数):
+    with ThreadPoolExecutor(max_workers=线程数) as 执行器:
+        for 世界 in 世界列表:
+            _, 区域文件列表 = 查找区域文件(os.path.join(存档目录, 世界))
+            结果列表 = list(执行器.map(lambda 路径: 精简区域文件(路径, 最大停留刻数, 仅预览), 区域文件列表))
+            删除数 = sum(r[0] for r in 结果列表)
+            节省字节 = sum(r[1] for r in 结果列表)
+            if 仅预览:
+                logging.info(f"{世界}：将删除 {删除数} 个区块")
+            else:
+                logging.info(f"{世界}：已删除 {删除数} 个区块，节省 {节省字节:,} 字节")
+
+def main():
+    """主函数"""
+    import argparse
+
+    共享存档配置.设置日志('存档区域分析.log')
+    parser = argparse.ArgumentParser(description='共享存档区域文件分析和精简工具')
+    parser.add_argument('--config', '-c', default=共享存档配置.配置文件路径, help='配置文件路径（默认为脚本目录下的 版本隔离配置.json）')
+    parser.add_argument('--saves', help='存档目录（默认为主目录的 saves）')
+    parser.add_argument('--world', action='append', help='只处理指定的世界，可重复指定')
+    parser.add_argument('--stale-days', type=float, default=30, help='超过多少天没有再保存的区块算作未再访问（默认 30）')
+    parser.add_argument('--threads', type=int, default=16, help='并行扫描的线程数')
+    parser.add_argument('--trim', action='store_true', help='删除未生成完成或几乎没有停留过的区块')
+    parser.add_argument('--max-inhabited', type=int, default=0, help='精简时删除 InhabitedTime 不超过该刻数的区块（默认 0）')
+    parser.add_argument('--dry-run', action='store_true', help='精简时只统计，不修改文件')
+    args = parser.parse_args()
+    args.saves = args.saves or os.path.join(共享存档配置.读取配置(args.config)["MC_根目录"], "saves")
+
+    世界列表 = args.world or sorted(
+        名称 for 名称 in os.listdir(args.saves) if os.path.isdir(os.path.join(args.saves, 名称))
+    )
+    分析世界(args.saves, 世界列表, args.stale_days, args.threads)
+    if args.trim:
+        精简世界(args.saves, 世界列表, args.max_inhabited, args.dry_run, args.threads)
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        logging.info("脚本被用户中断")
+    except Exception as e:
+        logging.error(f"脚本执行时出现错误：{str(e)}")
+        import traceback
+        logging.error(traceback.format_exc())
@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+"""
+1. 这是一个 Python 脚本，用于对共享后的 saves 文件夹做增量、去重的快照备份。
+2. 为什么要编写此脚本
+   `点击在版本隔离中共享存档.py` 把所有版本的存档集中到了主目录的 saves 中，但备份仍然是玩家或mod
+   整个世界复制一份，世界越大每次备份越慢、越占空间。而两次备份之间，大部分区块其实没有变化。
+3. 备份方式
+   - 区域文件（.mca）按区块拆分，每个区块以内容哈希为名在仓库中只存一份；
+   - 其他文件（level.dat 等）整体以内容哈希存储；
+   - 与上一个快照相比大小和修改时间都没变的文件直接复用上次的记录，不再读取；
+   - 文件分块读取和计算哈希（区域文件通过 mmap 按需读取），不会把整个文件读入内存；
+   - 无法读取的文件（如游戏运行时被锁定的 session.lock、遍历后被删除的文件）记录警告，
+     沿用上一个快照中的记录，上一个快照中也没有时跳过；
+   因此每次备份只需要写入发生变化的区块，快照本身只是一个记录哈希的 JSON 清单。
+4. 脚本使用方法
+   - python 存档增量备份.py backup                      创建一个新快照
+   - python 存档增量备份.py list                        列出所有快照
+   - python 存档增量备份.py restore <快照> [--world 世界名] [--to 目录]
+                                                       恢复快照（默认恢复到仓库的 恢复 目录中，不会覆盖现有世界）
+   - python 存档增量备份.py prune --keep 7              只保留最近 7 个快照，并删除不再被引用的区块
+   - 默认备份主目录的 saves，仓库位于主目录的 backups/增量备份，可用 --saves 和 --store 修改。
+
+@author Sakurakugu
+@date 2026-10-19
+"""
+
+import os
+import sys
+import json
+import mmap
+import hashlib
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import 共享存档配置
+import logging
+from lib.region import HEADER_SIZE, SECTOR_SIZE, iter_chunks, parse_header
+
+class 备份仓库:
+    """以内容哈希寻址的对象仓库和快照清单"""
+
+    块大小 = 1024 * 1024
+
+    def __init__(self, 仓库目录):
+        self.仓库目录 = 仓库目录
+        self.对象目录 = os.path.join(仓库目录, "objects")
+        self.快照目录 = os.path.join(仓库目录, "snapshots")
+        self.临时目录 = os.path.join(仓库目录, "tmp")
+        os.makedirs(self.对象目录, exist_ok=True)
+        os.makedirs(self.快照目录, exist_ok=True)
+        os.makedirs(self.临时目录, exist_ok=True)
+
+    @staticmethod
+    def 计算哈希(数据):
+        return hashlib.blake2b(数据, digest_size=20).hexdigest()
+
+    def 对象路径(self, 哈希):
+        return os.path.join(self.对象目录, 哈希[:2], 哈希[2:])
+
+    def 写入对象(self, 数据):
+        """写入一个对象，已存在时不再写入
+
+        Returns:
+            tuple: (哈希, 新写入的字节数)
+        """
+        哈希 = self.计算哈希(数据)
+        路径 = self.对象路径(哈希)
+        if os.path.exists(路径):
+            return 哈希, 0
+        os.makedirs(os.path.dirname(路径), exist_ok=True)
+        # 多个线程可能同时写入同一个对象，各自写临时文件再替换
+        临时路径 = f"{路径}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(临时路径, 'wb') as f:
+            f.write(数据)
+        os.replace(临时路径, 路径)
+        return 哈希, len(数据)
+
+    def 写入流(self, f):
+        """分块读取文件对象，边计算哈希边写入临时文件，已存在同样的对象时丢弃临时文件
+
+        Returns:
+            tuple: (哈希, 读取的字节数, 新写入的字节数)
+        """
+        哈希器 = hashlib.blake2b(digest_size=20)
+        大小 = 0
+        # 读完之前不知道哈希，临时文件先放在单独的目录中，清理时不会被当作对象
+        临时路径 = os.path.join(self.临时目录, f"{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(临时路径, 'wb') as 临时文件:
+                while 块 := f.read(self.块大小):
+                    哈希器.update(块)
+                    临时文件.write(块)
+                    大小 += len(块)
+            哈希 = 哈希器.hexdigest()
+            路径 = self.对象路径(哈希)
+            if os.path.exists(路径):
+                return 哈希, 大小, 0
+            os.makedirs(os.path.dirname(路径), exist_ok=True)
+            os.replace(临时路径, 路径)
+            return 哈希, 大小, 大小
+        finally:
+            if os.path.exists(临时路径):
+                os.remove(临时路径)
+
+    def 读取对象(self, 哈希):
+        with open(self.对象路径(哈希), 'rb') as f:
+            return f.read()
+
+    def 列出快照(self):
+        return sorted(名称[:-5] for 名称 in os.listdir(self.快照目录) if 名称.endswith(".json"))
+
+    def 读取快照(self, 名称):
+        with open(os.path.join(self.快照目录, f"{名称}.json"), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def 写入快照(self, 清单):
+        名称 = datetime.now().strftime("%Y%m%d_%H%M%S")
+        序号 = 1
+        while os.path.exists(os.path.join(self.快照目录, f"{名称}.json")):
+            名称 = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{序号}"
+            序号 += 1
+        路径 = os.path.join(self.快照目录, f"{名称}.json")
+        with open(路径 + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(清单, f, ensure_ascii=False)
+        os.replace(路径 + ".tmp", 路径)
+        return 名称
+
+    def 删除快照(self, 名称):
+        os.remove(os.path.join(self.快照目录, f"{名称}.json"))
+
+# 函数：备份单个区域文件
+def 备份区域文件(仓库, 数据):
+    """把区域文件拆成头部和各区块分别存储，任意区块损坏时返回 None 以便整体存储"""
+    新增字节 = 0
+    头部哈希, 写入 = 仓库.写入对象(bytes(数据[:HEADER_SIZE]))
+    新增字节 += 写入
+    区块列表 = []
+    for 索引, _, _, _, 区块数据 in iter_chunks(数据):
+        if 区块数据 is None:
+            return None
+        区块哈希, 写入 = 仓库.写入对象(区块数据)
+        新增字节 += 写入
+        区块列表.append([索引, 区块哈希])
+    return {"头部": 头部哈希, "区块": 区块列表}, 新增字节
+
+# 函数：备份单个文件
+def 备份文件(仓库, 路径, 上次条目):
+    """备份一个文件，大小和修改时间未变时直接复用上次的条目
+
+    Returns:
+        tuple: (条目, 新写入的字节数)
+    """
+    状态 = os.stat(路径)
+    if 上次条目 and 上次条目["大小"] == 状态.st_size and 上次条目["mtime_ns"] == 状态.st_mtime_ns:
+        return 上次条目, 0
+
+    with open(路径, 'rb') as f:
+        if 路径.endswith(".mca") and 状态.st_size >= HEADER_SIZE:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as 映射:
+                大小 = len(映射)
+                结果 = 备份区域文件(仓库, 映射)
+            if 结果 is not None:
+                区域条目, 新增字节 = 结果
+                return {"大小": 大小, "mtime_ns": 状态.st_mtime_ns, "类型": "区域", **区域条目}, 新增字节
+            logging.warning(f"区域文件 \"{路径}\" 存在损坏的区块，整体备份")
+        哈希, 大小, 新增字节 = 仓库.写入流(f)
+    return {"大小": 大小, "mtime_ns": 状态.st_mtime_ns, "类型": "文件", "对象": 哈希}, 新增字节
+
+# 函数：备份单个文件，读取失败时沿用上次的条目
+def 尝试备份文件(仓库, 路径, 上次条目):
+    """与 备份文件 相同，但读取失败时记录警告并返回 (上次条目, 0)，上次也没有该文件时返回 (None, 0)"""
+    try:
+        return 备份文件(仓库, 路径, 上次条目)
+    except OSError as e:
+        if 上次条目:
+            logging.warning(f"无法读取 \"{路径}\"，沿用上一个快照中的版本：{str(e)}")
+        else:
+            logging.warning(f"无法读取 \"{路径}\"，已跳过：{str(e)}")
+        return 上次条目, 0
+
+# 函数：创建快照
+def 创建快照(仓库, 存档目录, 线程数=8):
+    """对存档目录中的每个世界创建增量快照"""
+    快照列表 = 仓库.列出快照()
+    上次快照 = 仓库.读取快照(快照列表[-1]) if 快照列表 else {"世界": {}}
+
+    任务列表 = []
+    for 世界 in sorted(os.listdir(存档目录)):
+        世界路径 = os.path.join(存档目录, 世界)
+        if not os.path.isdir(世界路径):
+            continue
+        上次世界 = 上次快照["世界"].get(世界, {})
+        for 当前目录, _, 文件列表 in os.walk(世界路径):
+            for 文件名 in 文件列表:
+                路径 = os.path.join(当前目录, 文件名)
+                if os.path.islink(路径):
+                    continue
+                相对路径 = os.path.relpath(路径, 世界路径).replace(os.sep, "/")
+                任务列表.append((世界, 相对路径, 路径, 上次世界.get(相对路径)))
+
+    清单 = {"时间": datetime.now().isoformat(timespec="seconds"), "源目录": 存档目录, "世界": {}}
+    新增字节 = 0
+    复用文件数 = 0
+    with ThreadPoolExecutor(max_workers=线程数) as 执行器:
+        结果列表 = 执行器.map(lambda 任务: 尝试备份文件(仓库, 任务[2], 任务[3]), 任务列表)
+        for (世界, 相对路径, _, 上次条目), (条目, 写入) in zip(任务列表, 结果列表):
+            if 条目 is None:
+                continue
+            清单["世界"].setdefault(世界, {})[相对路径] = 条目
+            新增字节 += 写入
+            if 条目 is 上次条目:
+                复用文件数 += 1
+
+    清单["新增字节"] = 新增字节
+    名称 = 仓库.写入快照(清单)
+    总字节 = sum(条目["大小"] for 世界 in 清单["世界"].values() for 条目 in 世界.values())
+    文件数 = sum(len(世界) for 世界 in 清单["世界"].values())
+    logging.info(
+        f"快照 {名称} 创建完成：{len(清单['世界'])} 个世界，{文件数} 个文件（{复用文件数} 个未变化），"
+        f"存档共 {总字节:,} 字节，本次新写入 {新增字节:,} 字节"
+    )
+    return 名称
+
+# 函数：恢复单个文件
+def 恢复文件(仓库, 条目, 目标路径):
+    os.makedirs(os.path.dirname(目标路径), exist_ok=True)
+    with open(目标路径, 'wb') as f:
+        if 条目["类型"] == "区域":
+            头部 = 仓库.读取对象(条目["头部"])
+            位置表, _ = parse_header(头部)
+            f.write(头部)
+            for 索引, 区块哈希 in 条目["区块"]:
+                f.seek(位置表[索引][0] * SECTOR_SIZE)
+                f.write(仓库.读取对象(区块哈希))
+            # 区块之间的填充和末尾的空闲扇区以 0 补齐
+            f.truncate(条目["大小"])
+        else:
+            f.write(仓库.读取对象(条目["对象"]))
+    os.utime(目标路径, ns=(条目["mtime_ns"], 条目["mtime_ns"]))
+
+# 函数：恢复快照
+def 恢复快照(仓库, 名称, 目标目录, 世界名=None, 线程数=8):
+    """把快照中的世界恢复到目标目录，目标中已存在同名世界时跳过该世界"""
+    清单 = 仓库.读取快照(名称)
+    世界列表 = [世界名] if 世界名 else list(清单["世界"])
+    for 世界 in 世界列表:
+        if 世界 not in 清单["世界"]:
+            logging.error(f"快照 {名称} 中没有世界 \"{世界}\"")
+            continue
+        世界路径 = os.path.join(目标目录, 世界)
+        if os.path.exists(世界路径):
+            logging.error(f"目录 \"{世界路径}\" 已存在，跳过恢复")
+            continue
+        文件表 = 清单["世界"][世界]
+        with ThreadPoolExecutor(max_workers=线程数) as 执行器:
+            list(执行器.map(
+                lambda 项: 恢复文件(仓库, 项[1], os.path.join(世界路径, *项[0].split("/"))),
+                文件表.items()
+            ))
+        logging.info(f"已恢复世界 \"{世界}\"（{len(文件表)} 个文件）到 \"{世界路径}\"")
+
+# 函数：清理旧快照
+def 清理快照(仓库, 保留数量):
+    """只保留最近的若干个快照，并删除不再被任何快照引用的对象"""
+    快照列表 = 仓库.列出快照()
+    待删除 = 快照列表[:-保留数量] if 保留数量 > 0 else 快照列表
+    for 名称 in 待删除:
+        仓库.删除快照(名称)
+        logging.info(f"已删除快照 {名称}")
+
+    引用的对象 = set()
+    for 名称 in 仓库.列出快照():
+        for 世界 in 仓库.读取快照(名称)["世界"].values():
+            for 条目 in 世界.values():
+                if 条目["类型"] == "区域":
+                    引用的对象.add(条目["头部"])
+                    引用的对象.update(区块哈希 for _, 区块哈希 in 条目["区块"])
+                else:
+                    引用的对象.add(条目["对象"])
+
+    删除数量 = 0
+    释放字节 = 0
+    for 前缀 in os.listdir(仓库.对象目录):
+        前缀目录 = os.path.join(仓库.对象目录, 前缀)
+        for 文件名 in os.listdir(前缀目录):
+            if 前缀 + 文件名 not in 引用的对象:
+                路径 = os.path.join(前缀目录, 文件名)
+                释放字节 += os.path.getsize(路径)
+                os.remove(路径)
+                删除数量 += 1
+    logging.info(f"已删除 {len(待删除)} 个快照和 {删除数量} 个不再引用的对象，释放 {释放字节:,} 字节")
+
+# 函数：列出快照
+def 列出快照(仓库):
+    for 名称 in 仓库.列出快照():
+        清单 = 仓库.读取快照(名称)
+        文件数 = sum(len(世界) for 世界 in 清单["世界"].values())
+        logging.info(
+            f"{名称}：{len(清单['世界'])} 个世界，{文件数} 个文件，新写入 {清单.get('新增字节', 0):,} 字节"
+        )
+
+def main():
+    """主函数"""
+    import argparse
+
+    共享存档配置.设置日志('存档增量备份.log')
+    parser = argparse.ArgumentParser(description='共享存档增量去重备份工具')
+    parser.add_argument('--config', '-c', default=共享存档配置.配置文件路径, help='配置文件路径（默认为脚本目录下的 版本隔离配置.json）')
+    parser.add_argument('--saves', help='要备份的存档目录（默认为主目录的 saves）')
+    parser.add_argument('--store', help='备份仓库目录（默认为主目录的 backups/增量备份）')
+    parser.add_argument('--threads', type=int, default=8, help='并行读取和写入的线程数')
+    子命令 = parser.add_subparsers(dest='command', required=True)
+    子命令.add_parser('backup', help='创建一个新快照')
+    子命令.add_parser('list', help='列出所有快照')
+    恢复参数 = 子命令.add_parser('restore', help='恢复快照')
+    恢复参数.add_argument('snapshot', help='快照名称')
+    恢复参数.add_argument('--world', help='只恢复指定的世界')
+    恢复参数.add_argument('--to', help='恢复到的目录（默认为仓库中的 恢复/<快照名>）')
+    清理参数 = 子命令.add_parser('prune', help='删除旧快照和不再引用的区块')
+    清理参数.add_argument('--keep', type=int, required=True, help='保留最近的快照数量')
+    args = parser.parse_args()
+    MC_根目录 = 共享存档配置.读取配置(args.config)["MC_根目录"]
+    args.saves = args.saves or os.path.join(MC_根目录, "saves")
+    args.store = args.store or os.path.join(MC_根目录, "backups", "增量备份")
+
+    仓库 = 备份仓库(args.store)
+    if args.command == 'backup':
+        创建快照(仓库, args.saves, args.threads)
+    elif args.command == 'list':
+        列出快照(仓库)
+    elif args.command == 'restore':
+        目标目录 = args.to or os.path.join(args.store, "恢复", args.snapshot)
+        恢复快照(仓库, args.snapshot, 目标目录, args.world, args.threads)
+    elif args.command == 'prune':
+        清理快照(仓库, args.keep)
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        logging.info("脚本被用户中断")
+    except Exception as e:
+        logging.error(f"脚本执行时出现错误：{str(e)}")
+        import traceback
+        logging.error(traceback.format_exc())
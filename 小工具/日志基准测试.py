@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+1. 这是一个 Python 脚本，用于测量 lib/log.py 的导入耗时和每次日志调用的开销。
+2. 为什么要编写此脚本
+   lib/log.py 被所有小工具导入，导入时的开销（以前会导入 Rich 并创建日志文件）会加到每个工具的启动时间上；
+   移动和链接时的逐项日志则直接影响共享存档脚本的耗时。修改 lib/log.py 后需要能比较改动前后的差异。
+3. 测量内容
+   - 导入：在新的解释器中分别测量 `import lib.log` 和 `import lib.log` + configure() 的耗时（取中位数），
+     以及导入后是否已经加载了 Rich；
+   - 调用：同步模式、异步模式下每次 logging.info 的平均耗时，以及被级别过滤掉的 logging.debug 的耗时；
+   - 退出检查：异步模式使用很小的有界队列（drop_new / drop_old 策略）时大量写日志后退出，
+     检查退出时没有异常、丢弃计数的警告已写入文件（drop_old 还要求最后一条日志已写入）；检查不通过时以状态码 1 退出。
+4. 脚本使用方法
+   - python 日志基准测试.py                        输出 JSON 结果
+   - python 日志基准测试.py --repeat 20 --calls 50000 -o 日志基准.json
+
+@author Sakurakugu
+@date 2026-10-19
+"""
+
+import os
+import sys
+import json
+import shutil
+import platform
+import statistics
+import subprocess
+import tempfile
+
+仓库目录 = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 在新的解释器中运行，输出 [耗时, 是否已加载 Rich]
+导入测试代码 = """
+import sys, time
+sys.path.insert(0, {仓库目录!r})
+开始 = time.perf_counter()
+import lib.log
+{配置代码}
+耗时 = time.perf_counter() - 开始
+print(耗时, 'rich' in sys.modules)
+"""
+
+调用测试代码 = """
+import sys, time, logging
+sys.path.insert(0, {仓库目录!r})
+from lib.log import configure
+configure(path={日志路径!r}, console_level=logging.CRITICAL, file_level=logging.INFO, async_mode={异步})
+开始 = time.perf_counter()
+for i in range({次数}):
+    logging.info("移动 \\"%s\\" 到 \\"%s\\"...", i, i)
+每次_info = (time.perf_counter() - 开始) / {次数}
+开始 = time.perf_counter()
+for i in range({次数}):
+    logging.debug("移动 \\"%s\\" 到 \\"%s\\"...", i, i)
+每次_debug = (time.perf_counter() - 开始) / {次数}
+print(每次_info, 每次_debug)
+"""
+
+退出检查代码 = """
+import sys, logging
+sys.path.insert(0, {仓库目录!r})
+from lib.log import configure
+configure(path={日志路径!r}, console_level=logging.CRITICAL, async_mode=True, queue_size=100,
+          overflow_policy={策略!r}, aggregate=True)
+for i in range({次数}):
+    logging.info("移动 \\"%s\\" 到 \\"%s\\"...", i, i)
+logging.warning("最后一条日志")
+"""
+
+# 函数：在新的解释器中运行一段代码
+def 运行代码(代码, 工作目录):
+    结果 = subprocess.run([sys.executable, "-c", 代码], capture_output=True, text=True, cwd=工作目录, check=True)
+    return 结果.stdout.split()
+
+# 函数：测量导入耗时
+def 测量导入(重复次数, 配置代码, 工作目录):
+    耗时列表 = []
+    加载了Rich = False
+    for _ in range(重复次数):
+        耗时, rich = 运行代码(导入测试代码.format(仓库目录=仓库目录, 配置代码=配置代码), 工作目录)
+        耗时列表.append(float(耗时))
+        加载了Rich = 加载了Rich or rich == "True"
+    return {"耗时": statistics.median(耗时列表), "耗时列表": 耗时列表, "加载了Rich": 加载了Rich}
+
+# 函数：测量每次日志调用的耗时
+def 测量调用(次数, 异步, 工作目录):
+    日志路径 = os.path.join(工作目录, "log", "异步.log" if 异步 else "同步.log")
+    每次_info, 每次_debug = 运行代码(调用测试代码.format(仓库目录=仓库目录, 日志路径=日志路径, 异步=异步, 次数=次数), 工作目录)
+    return {"info": float(每次_info), "被过滤的debug": float(每次_debug)}
+
+# 函数：检查队列满时的退出输出
+def 检查退出(策略, 次数, 重复次数, 工作目录):
+    """队列满时退出不应抛出异常，丢弃计数的警告应写入文件；drop_old 还应保留最后一条日志"""
+    问题 = []
+    for 序号 in range(重复次数):
+        日志路径 = os.path.join(工作目录, "log", f"退出_{策略}_{序号}.log")
+        结果 = subprocess.run(
+            [sys.executable, "-c", 退出检查代码.format(仓库目录=仓库目录, 日志路径=日志路径, 策略=策略, 次数=次数)],
+            capture_output=True, text=True, cwd=工作目录,
+        )
+        try:
+            with open(日志路径, 'r', encoding='utf-8') as f:
+                内容 = f.read()
+        except FileNotFoundError:
+            内容 = ""
+            问题.append(f"第 {序号 + 1} 次没有生成日志文件")
+        if 结果.returncode != 0 or "Traceback" in 结果.stderr or "Exception ignored" in 结果.stderr:
+            问题.append(f"第 {序号 + 1} 次退出时出现异常：{结果.stderr.strip()[-300:]}")
+        if "日志队列已满" not in 内容:
+            问题.append(f"第 {序号 + 1} 次没有写入丢弃计数的警告")
+        # drop_new 在队列满时本来就会丢弃最后一条，只有 drop_old 必须保留最新的日志
+        if 策略 == "drop_old" and "最后一条日志" not in 内容:
+            问题.append(f"第 {序号 + 1} 次没有写入最后一条日志")
+    return {"通过": not 问题, "问题": 问题}
+
+def main():
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='lib/log.py 的导入耗时和日志调用开销基准测试')
+    parser.add_argument('--repeat', type=int, default=10, help='导入测试的重复次数，耗时取中位数（默认 10）')
+    parser.add_argument('--calls', type=int, default=20000, help='调用测试中每种日志的调用次数（默认 20000）')
+    parser.add_argument('--output', '-o', help='把 JSON 结果写入文件（默认输出到标准输出）')
+    args = parser.parse_args()
+
+    # 在临时目录中运行，确认导入不会在当前目录创建 log 文件夹
+    工作目录 = tempfile.mkdtemp(prefix="日志基准_")
+    try:
+        导入 = 测量导入(args.repeat, "", 工作目录)
+        导入["创建了文件"] = bool(os.listdir(工作目录))
+        输出 = {
+            "参数": {"repeat": args.repeat, "calls": args.calls},
+            "环境": {"python": platform.python_version(), "系统": platform.platform()},
+            "导入": 导入,
+            "导入并配置": 测量导入(args.repeat, "lib.log.configure(path='./log/app.log')", 工作目录),
+            "每次调用": {"同步": 测量调用(args.calls, False, 工作目录), "异步": 测量调用(args.calls, True, 工作目录)},
+            "退出检查": {策略: 检查退出(策略, 50000, 3, 工作目录) for 策略 in ("drop_new", "drop_old")},
+        }
+    finally:
+        shutil.rmtree(工作目录, ignore_errors=True)
+
+    文本 = json.dumps(输出, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(文本)
+    else:
+        print(文本)
+    if not all(结果["通过"] for 结果 in 输出["退出检查"].values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("脚本被用户中断", file=sys.stderr)
@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+"""
+1. 这是一个 Python 脚本，用于扫描各版本 mods 文件夹中的 mod，找出 mod 冲突，判断版本能否共享存档。
+2. 为什么要编写此脚本
+   `点击在版本隔离中共享存档.py` 会跳过所有带 mods 文件夹的版本，因为不同版本装的辅助 mod 可能互相冲突，
+   装了内容 mod 的版本存档也不能和原版共用。但到底哪个版本能安全地加入 `含mod但也处理的存档目录`，
+   以前只能一个个 jar 打开看。
+3. 扫描方式
+   - 每个 jar 只读取中央目录和其中的 fabric.mod.json / quilt.mod.json / META-INF/mods.toml
+     （或 neoforge.mods.toml），不解压其他文件；
+   - 多个 jar 在线程池中并行读取；结果按 jar 的内容哈希缓存在 cache/模组索引.json 中，
+     大小和修改时间未变的 jar 不会重新计算哈希，同一个 jar 出现在多个版本中也只解析一次；
+   - 报告每个版本的 mod id、版本号，版本内的重复 mod 和声明的冲突（breaks / conflicts / incompatible），
+     以及同一个 mod 在不同版本文件夹中的不同版本。
+   - 如果一个版本中只有仅客户端的 mod 和常见的库 mod，则认为它不会改变存档内容，可以加入 `含mod但也处理的存档目录`。
+4. 脚本使用方法
+   - python 模组元数据扫描.py                          扫描所有根目录中带 mods 文件夹的版本
+   - python 模组元数据扫描.py --version "1.21.9"       只扫描指定版本（可重复指定）
+   - python 模组元数据扫描.py --output 模组报告.json    同时把结果写入 JSON 文件
+   - `点击在版本隔离中共享存档.py` 每次运行结束后也会对跳过的版本输出简要结论。
+
+@author Sakurakugu
+@date 2026-10-19
+"""
+
+import os
+import re
+import json
+import hashlib
+import logging
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import tomllib
+except ImportError:  # Python 3.10 及以下
+    tomllib = None
+
+缓存文件路径 = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', '模组索引.json')
+# 不添加方块、物品等内容的常见库 mod，不影响存档共享
+库模组 = {
+    "fabric-api", "fabricloader", "minecraft", "java", "fabric-language-kotlin", "cloth-config", "cloth_config",
+    "yet_another_config_lib_v3", "architectury", "forge", "neoforge", "quilt_loader", "quilted_fabric_api",
+}
+
+# 函数：计算 jar 的哈希
+def 计算哈希(路径):
+    哈希 = hashlib.blake2b(digest_size=20)
+    with open(路径, 'rb') as f:
+        for 块 in iter(lambda: f.read(1024 * 1024), b""):
+            哈希.update(块)
+    return 哈希.hexdigest()
+
+# 函数：解析 fabric.mod.json
+def 解析fabric(数据):
+    元数据 = json.loads(数据.decode("utf-8-sig"), strict=False)
+    冲突 = list(元数据.get("breaks", {})) + list(元数据.get("conflicts", {}))
+    return [{
+        "id": 元数据.get("id"),
+        "名称": 元数据.get("name", 元数据.get("id")),
+        "版本": 元数据.get("version"),
+        "加载器": "fabric",
+        "环境": 元数据.get("environment", "*"),
+        "冲突": 冲突,
+    }]
+
+Quilt环境 = {"*": "*", "client": "client", "dedicated_server": "server"}
+
+# 函数：解析 quilt.mod.json
+def 解析quilt(数据):
+    元数据 = json.loads(数据.decode("utf-8-sig"), strict=False)
+    加载器 = 元数据.get("quilt_loader", {})
+    冲突 = [项 if isinstance(项, str) else 项.get("id") for 项 in 加载器.get("breaks", [])]
+    # Quilt 的环境取值为 "*"、"client"、"dedicated_server"，统一为 Fabric 的 "*"、"client"、"server"
+    环境 = Quilt环境.get(元数据.get("minecraft", {}).get("environment", "*"), "*")
+    return [{
+        "id": 加载器.get("id"),
+        "名称": 加载器.get("metadata", {}).get("name", 加载器.get("id")),
+        "版本": 加载器.get("version"),
+        "加载器": "quilt",
+        "环境": 环境,
+        "冲突": 冲突,
+    }]
+
+# 函数：解析 mods.toml
+def 解析forge(数据, 加载器):
+    文本 = 数据.decode("utf-8-sig", "replace")
+    if tomllib is None:
+        # 没有 tomllib 时只取出 modId 和 version
+        模组列表 = [{"modId": 匹配.group(1)} for 匹配 in re.finditer(r'modId\s*=\s*"([^"]+)"', 文本)]
+        版本列表 = re.findall(r'^\s*version\s*=\s*"([^"]+)"', 文本, re.M)
+        for 模组, 版本 in zip(模组列表, 版本列表):
+            模组["version"] = 版本
+        依赖表 = {}
+    else:
+        元数据 = tomllib.loads(文本)
+        模组列表 = 元数据.get("mods", [])
+        依赖表 = 元数据.get("dependencies", {})
+    结果 = []
+    for 模组 in 模组列表:
+        模组id = 模组.get("modId")
+        依赖列表 = 依赖表.get(模组id, []) if isinstance(依赖表, dict) else []
+        冲突 = [依赖.get("modId") for 依赖 in 依赖列表 if str(依赖.get("type", "")).lower() == "incompatible"]
+        结果.append({
+            "id": 模组id,
+            "名称": 模组.get("displayName", 模组id),
+            "版本": 模组.get("version"),
+            "加载器": 加载器,
+            # Forge 没有声明 mod 自身运行环境的字段，只有 NeoForge 的 clientSideOnly 可以参考
+            "环境": "client" if 模组.get("clientSideOnly") else "*",
+            "冲突": 冲突,
+        })
+    return 结果
+
+# 函数：读取 jar 中的 mod 信息
+def 读取模组信息(路径):
+    """只读取中央目录和元数据文件，返回 jar 中声明的 mod 列表；读取失败时返回 {"错误": ...}"""
+    try:
+        with zipfile.ZipFile(路径) as 压缩包:
+            名称集合 = set(压缩包.namelist())
+            if "fabric.mod.json" in 名称集合:
+                return 解析fabric(压缩包.read("fabric.mod.json"))
+            if "quilt.mod.json" in 名称集合:
+                return 解析quilt(压缩包.read("quilt.mod.json"))
+            if "META-INF/neoforge.mods.toml" in 名称集合:
+                return 解析forge(压缩包.read("META-INF/neoforge.mods.toml"), "neoforge")
+            if "META-INF/mods.toml" in 名称集合:
+                return 解析forge(压缩包.read("META-INF/mods.toml"), "forge")
+            return []
+    except Exception as e:
+        return {"错误": str(e)}
+
+# 函数：扫描版本
+def 扫描版本(版本目录列表, 线程数=16):
+    """扫描每个版本的 mods 文件夹
+
+    Returns:
+        dict: {版本目录: [{"文件": jar 文件名, "id": ..., "版本": ..., ...}, ...]}
+    """
+    try:
+        with open(缓存文件路径, 'r', encoding='utf-8') as f:
+            缓存 = json.load(f)
+    except (FileNotFoundError, ValueError):
+        缓存 = {}
+    文件缓存 = 缓存.get("文件", {})
+    元数据缓存 = 缓存.get("元数据", {})
+
+    jar列表 = []
+    for 版本目录 in 版本目录列表:
+        mods目录 = os.path.join(版本目录, "mods")
+        if not os.path.isdir(mods目录):
+            continue
+        with os.scandir(mods目录) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(".jar"):
+                    状态 = entry.stat()
+                    jar列表.append((版本目录, entry.path, 状态.st_size, 状态.st_mtime_ns))
+
+    def 获取哈希(项):
+        _, 路径, 大小, mtime_ns = 项
+        上次 = 文件缓存.get(路径)
+        if 上次 and 上次[0] == 大小 and 上次[1] == mtime_ns:
+            return 上次[2]
+        return 计算哈希(路径)
+
+    with ThreadPoolExecutor(max_workers=线程数) as 执行器:
+        哈希列表 = list(执行器.map(获取哈希, jar列表))
+        待解析 = {}
+        for (_, 路径, _, _), 哈希 in zip(jar列表, 哈希列表):
+            if 哈希 not in 元数据缓存:
+                待解析.setdefault(哈希, 路径)
+        for 哈希, 信息 in zip(待解析, 执行器.map(读取模组信息, 待解析.values())):
+            元数据缓存[哈希] = 信息
+
+    结果 = {版本目录: [] for 版本目录 in 版本目录列表}
+    新文件缓存 = {}
+    for (版本目录, 路径, 大小, mtime_ns), 哈希 in zip(jar列表, 哈希列表):
+        新文件缓存[路径] = [大小, mtime_ns, 哈希]
+        信息 = 元数据缓存[哈希]
+        if isinstance(信息, dict):
+            logging.warning(f"读取 \"{路径}\" 失败：{信息['错误']}")
+            continue
+        文件名 = os.path.basename(路径)
+        for 模组 in 信息:
+            模组 = {"文件": 文件名, **模组}
+            if not 模组["id"]:
+                # 元数据中没有 id 时用 jar 文件名代替，否则 None 与其他 id 一起排序时会出错
+                模组["id"] = os.path.splitext(文件名)[0]
+                模组["名称"] = 模组["名称"] or 模组["id"]
+            结果[版本目录].append(模组)
+
+    # 只保留仍然存在的 jar，避免缓存无限增长
+    使用中的哈希 = {值[2] for 值 in 新文件缓存.values()}
+    os.makedirs(os.path.dirname(缓存文件路径), exist_ok=True)
+    with open(缓存文件路径, 'w', encoding='utf-8') as f:
+        json.dump({
+            "文件": 新文件缓存,
+            "元数据": {哈希: 信息 for 哈希, 信息 in 元数据缓存.items() if 哈希 in 使用中的哈希},
+        }, f, ensure_ascii=False)
+    logging.debug(f"共扫描 {len(jar列表)} 个 jar，解析 {len(待解析)} 个")
+    return 结果
+
+# 函数：分析扫描结果
+def 分析冲突(扫描结果):
+    """Returns:
+        tuple: (
+            {版本目录: {"重复": [...], "冲突": [...], "影响存档": [...], "可共享存档": bool}},
+            {mod id: {版本号: [版本目录, ...]}}  同一个 mod 在不同版本文件夹中版本不同的情况
+        )
+    """
+    版本报告 = {}
+    跨版本 = {}
+    for 版本目录, 模组列表 in 扫描结果.items():
+        id集合 = {}
+        for 模组 in 模组列表:
+            id集合.setdefault(模组["id"], []).append(模组["文件"])
+            跨版本.setdefault(模组["id"], {}).setdefault(模组["版本"], []).append(版本目录)
+        重复 = [f"{模组id}: {', '.join(文件)}" for 模组id, 文件 in id集合.items() if len(文件) > 1]
+        冲突 = sorted({
+            f"{模组['id']} 与 {对方} 冲突" for 模组 in 模组列表 for 对方 in 模组["冲突"] if 对方 in id集合
+        })
+        影响存档 = sorted({
+            模组["id"] for 模组 in 模组列表 if 模组["环境"] != "client" and 模组["id"] not in 库模组
+        })
+        版本报告[版本目录] = {
+            "重复": 重复,
+            "冲突": 冲突,
+            "影响存档": 影响存档,
+            "可共享存档": not 影响存档 and not 重复 and not 冲突,
+        }
+    跨版本 = {模组id: 版本表 for 模组id, 版本表 in 跨版本.items() if len(版本表) > 1}
+    return 版本报告, 跨版本
+
+# 函数：输出简要结论
+def 输出简要报告(扫描结果, 版本报告):
+    for 版本目录, 报告 in 版本报告.items():
+        版本名 = os.path.basename(版本目录)
+        数量 = len(扫描结果[版本目录])
+        if 数量 == 0:
+            logging.info(f"版本 {版本名} 的 mods 文件夹中没有可识别的mod，若文件夹确实为空，可以删除它或加入 含mod但也处理的存档目录")
+        elif 报告["可共享存档"]:
+            logging.info(f"版本 {版本名} 的 {数量} 个mod均为客户端mod或库mod，可以加入 含mod但也处理的存档目录")
+        else:
+            原因 = []
+            if 报告["影响存档"]:
+                原因.append(f"{len(报告['影响存档'])} 个mod可能影响存档")
+            if 报告["重复"] or 报告["冲突"]:
+                原因.append(f"{len(报告['重复']) + len(报告['冲突'])} 处重复或冲突")
+            logging.info(f"版本 {版本名} 共 {数量} 个mod，{'，'.join(原因)}，不建议共享存档")
+
+def main():
+    """主函数"""
+    import argparse
+    import 共享存档配置
+
+    共享存档配置.设置日志('模组元数据扫描.log')
+    parser = argparse.ArgumentParser(description='各版本 mod 元数据扫描和冲突报告')
+    parser.add_argument('--config', '-c', default=共享存档配置.配置文件路径, help='配置文件路径（默认为脚本目录下的 版本隔离配置.json）')
+    parser.add_argument('--version', '-v', action='append', help='只扫描指定的版本文件夹名，可重复指定')
+    parser.add_argument('--output', '-o', help='把完整结果写入 JSON 文件')
+    parser.add_argument('--threads', type=int, default=16, help='并行读取的线程数')
+    args = parser.parse_args()
+
+    版本目录列表 = []
+    for 根目录 in 共享存档配置.获取根目录列表(共享存档配置.读取配置(args.config)):
+        版本根目录 = os.path.join(根目录, "versions")
+        if not os.path.isdir(版本根目录):
+            continue
+        for 版本名 in sorted(os.listdir(版本根目录)):
+            版本目录 = os.path.join(版本根目录, 版本名)
+            if os.path.isdir(os.path.join(版本目录, "mods")) and (not args.version or 版本名 in args.version):
+                版本目录列表.append(版本目录)
+
+    扫描结果 = 扫描版本(版本目录列表, args.threads)
+    版本报告, 跨版本 = 分析冲突(扫描结果)
+    for 版本目录, 模组列表 in 扫描结果.items():
+        logging.info(f"版本 \"{版本目录}\"：")
+        for 模组 in sorted(模组列表, key=lambda 模组: 模组["id"] or ""):
+            logging.info(f"  {模组['id']} {模组['版本']} [{模组['加载器']}, 环境 {模组['环境']}]  {模组['文件']}")
+        for 说明 in 版本报告[版本目录]["重复"]:
+            logging.warning(f"  重复的mod：{说明}")
+        for 说明 in 版本报告[版本目录]["冲突"]:
+            logging.warning(f"  声明的冲突：{说明}")
+    for 模组id, 版本表 in 跨版本.items():
+        说明 = "；".join(f"{版本} 在 {', '.join(os.path.basename(目录) for 目录 in 目录列表)}" for 版本, 目录列表 in 版本表.items())
+        logging.info(f"mod {模组id} 在不同版本文件夹中的版本不同：{说明}")
+    输出简要报告(扫描结果, 版本报告)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"mods": 扫描结果, "versions": 版本报告, "cross_version": 跨版本}, f, ensure_ascii=False, indent=2)
+        logging.info(f"输出路径: {os.path.abspath(args.output)}")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        logging.info("脚本被用户中断")
+    except Exception as e:
+        logging.error(f"脚本执行时出现错误：{str(e)}")
+        import traceback
+        logging.error(traceback.format_exc())
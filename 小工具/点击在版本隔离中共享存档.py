@@ -14,67 +14,98 @@
 4. 脚本使用方法
    - 确保 Python 已安装在您的计算机上。
    - 通过记事本或VSCode等文本编辑器打开此脚本。
-   - 编辑脚本中的 `MC_根目录` 变量，将其设置为您的 Minecraft 根目录（包含 `versions` 文件夹的 `.minecraft` 目录）。
-   - 编辑脚本中的 `含mod但也处理的存档目录` 变量，将其设置为您想要处理的存档目录（包含 `mod` 的 `versions` 目录）。
+   - 编辑 `共享存档配置.py` 中的 `MC_根目录` 变量，将其设置为您的 Minecraft 根目录（包含 `versions` 文件夹的 `.minecraft` 目录）。
+   - 编辑 `共享存档配置.py` 中的 `含mod但也处理的存档目录` 变量，将其设置为您想要处理的存档目录（包含 `mod` 的 `versions` 目录）。
    - 运行脚本。它将创建符号链接，将存档文件夹链接到版本文件夹。
    - 您可以在 `versions` 文件夹中找到链接的存档文件夹。
-   
+   - 如有多个启动器实例，可复制 `版本隔离配置.示例.json` 为 `版本隔离配置.json` 并填写 `实例根目录` 等配置，
+     所有根目录会并发处理，配置文件中的值会覆盖脚本中的默认值。
+   - 脚本会在 `cache/版本隔离状态.json` 中记录每个目录的状态，再次运行时只处理有变化的版本；使用 `--full` 参数可强制完整扫描。
+   - 每次运行结束后会增量更新共享文件夹的 SQLite 索引（见 `共享文件夹索引.py`），使用 `--no-index` 参数可跳过。
+   - 对于因 mods 被跳过的版本，脚本会扫描其中的mod并提示能否加入 `含mod但也处理的存档目录`（见 `模组元数据扫描.py`），
+     使用 `--no-mod-scan` 参数可跳过。
+   - 使用 `--watch` 参数运行时，脚本处理完成后会常驻监视 `versions` 目录，启动器安装的新版本会在几秒内自动共享。
+   - 使用 `--profile` 参数时退出前输出各阶段的耗时汇总，`--trace 文件` 还会写出可在 chrome://tracing 中查看的时间线。
+
 @author Sakurakugu
 @date 2025-07-03 05:27:53 (UTC+8) 周四
 @change 2025-10-16 22:42:55 (UTC+8) 周六
 """
 
 import os
+import sys
 import shutil
 import platform
 import re
 import subprocess
 import ctypes
+import asyncio
+import json
+import select
+import struct
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import 共享文件夹索引
+import 模组元数据扫描
+import 共享存档配置
+
+# 默认配置见 共享存档配置.py，运行时会被 版本隔离配置.json 覆盖
+MC_根目录 = 共享存档配置.MC_根目录
+# 其他启动器实例的根目录，它们的资源文件夹都会合并并链接到主目录
+实例根目录 = 共享存档配置.实例根目录
+含mod但也处理的存档目录 = 共享存档配置.含mod但也处理的存档目录
+要链接的文件夹 = 共享存档配置.要链接的文件夹
+# 记录每个目录的状态，重新运行时跳过未变化的目录
+状态文件路径 = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', '版本隔离状态.json')
+全量扫描 = False
+更新共享文件夹索引 = True
+扫描跳过版本的模组 = True
+目录状态 = {}
+# 并发设置：线程池大小，以及同一个根目录下同时处理的目录数
+最大线程数 = 共享存档配置.最大线程数
+每个根目录并发数 = 共享存档配置.每个根目录并发数
+配置文件路径 = 共享存档配置.配置文件路径
 
-# 设置主目录
-MC_根目录 = "D:\\Software\\Games\\我的世界\\.minecraft"
-官方MC_根目录 = os.path.join(os.environ.get('APPDATA', ''), '.minecraft')
-待处理的目录 = []
-目标存档路径 = os.path.join(MC_根目录, "saves")
-含mod但也处理的存档目录 = [
-    "1.21.9",
-    "1.21.10 原版"
-]
-要链接的文件夹 = [
-    "resourcepacks",  # 资源包
-    "shaderpacks",    # 光影
-    "backups",        # 备份
-    "saves",          # 存档
-    "schematics",     # 投影mod
-    "screenshots"     # 截图
-]
-
-# 配置日志输出
-log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'log')
+# lib 位于仓库根目录，直接运行脚本时需要把根目录加入搜索路径；日志只在作为脚本运行时才配置（见 设置日志），
+# 其他工具导入本脚本时不会被改写日志输出
+仓库根目录 = 共享存档配置.仓库根目录
+if 仓库根目录 not in sys.path:
+    sys.path.insert(0, 仓库根目录)
 try:
-    from lib.log import logging, set_log_path, set_log_level, setup_logging
-    set_log_path(os.path.join(log_dir, '版本隔离.log')) # 设置自定义日志文件名
-    set_log_level(logging.INFO) # 设置日志级别
-    setup_logging() # 重新设置日志配置
+    from lib.log import logging, enable_metrics, span, timed, count as 计数
 except ImportError:
-    import os
     import logging
-    # 确保日志目录存在（相对于脚本文件位置）
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir, exist_ok=True)
-
-    logging.basicConfig(
-        level="DEBUG",
-        handlers=[
-            logging.StreamHandler(), 
-            logging.FileHandler(os.path.join(log_dir, '版本隔离.log'), encoding='utf-8')
-        ],
-        format='%(asctime)s - %(levelname)-8s - %(lineno)-3d - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    # 没有 lib.log 时计时统计不可用，提供空实现
+    import contextlib
+    def enable_metrics(enabled=True, trace_path=None, trace_limit=None):
+        logging.warning("没有找到 lib.log，无法统计耗时")
+    def span(name, **attrs):
+        return contextlib.nullcontext()
+    def timed(name=None):
+        return lambda func: func
+    def 计数(name, value=1):
+        pass
+try:
+    # 版本号与数据包格式的对照表，与数据包打包工具共用 lib/version_registry.json
+    from lib.version_registry import datapack_format
+except ImportError:
+    def datapack_format(version):
+        return None
 # logging.info("-"*50)
 
+# 函数：设置日志
+def 设置日志():
+    """日志写入 log/版本隔离.log，控制台只显示信息及以上级别，文件中保留调试信息"""
+    共享存档配置.设置日志(
+        '版本隔离.log',
+        max_bytes=10 * 1024 * 1024, backup_count=5, # 超过 10 MiB 时轮转，保留 5 个压缩后的旧日志
+        async_mode=True, # 移动和链接时的大量日志由后台线程输出
+        aggregate=True, aggregate_file_full_detail=True, # 控制台合并重复的逐项日志，日志文件保留全部记录
+    )
+
 # 函数：创建符号链接
+@timed("创建软链接")
 def 创建软链接(待创路径, 目标路径):
     """创建符号链接"""
     if os.path.exists(待创路径):
@@ -85,7 +116,7 @@ def 创建软链接(待创路径, 目标路径):
             else:
                 os.remove(待创路径)
         else:
-            logging.debug(f"目录 \"{os.path.basename(待创路径)}\" 已是符号链接，跳过")
+            logging.debug("目录 \"%s\" 已是符号链接，跳过", os.path.basename(待创路径))
             return
     
     try:
@@ -101,15 +132,20 @@ def 创建软链接(待创路径, 目标路径):
                 logging.error(f"创建符号链接失败：{result.stderr}")
                 logging.error("请检查权限或路径是否正确。")
             else:
-                logging.info(f"创建符号链接成功：\"{待创路径}\" ===>> \"{目标路径}\"")
+                logging.info("创建符号链接成功：\"%s\" ===>> \"%s\"", 待创路径, 目标路径, extra={"操作": "链接", "源": 待创路径, "目标": 目标路径})
         else:
             # 在Unix-like系统上使用os.symlink
             os.symlink(目标路径, 待创路径)
-            logging.info(f"创建符号链接成功：\"{待创路径}\" ===>> \"{目标路径}\"")
+            logging.info("创建符号链接成功：\"%s\" ===>> \"%s\"", 待创路径, 目标路径, extra={"操作": "链接", "源": 待创路径, "目标": 目标路径})
     except Exception as e:
         logging.error(f"创建符号链接时出错：{str(e)}")
 
+# 正在移动中的目标路径
+移动锁 = threading.Lock()
+已预留路径 = set()
+
 # 函数：移动文件夹内容并处理重名
+@timed("移动文件夹内容")
 def 移动文件夹内容(源路径, 目标路径, 版本名字=""):
     """移动文件夹内容并处理重名"""
     if not os.path.exists(源路径):
@@ -138,20 +174,29 @@ def 移动文件夹内容(源路径, 目标路径, 版本名字=""):
         
         新项目路径 = os.path.join(目标路径, 项目名)
         # 检查项目路径是否已存在，如果存在，则添加 "(数字)" 后缀
-        count = 1
-        while os.path.exists(新项目路径):
-            if os.path.isdir(项目路径):
-                新项目路径 = os.path.join(目标路径, f"{项目名} ({count})")
-            else:
-                文件名, 扩展名 = os.path.splitext(项目名)
-                新项目路径 = os.path.join(目标路径, f"{文件名} ({count}){扩展名}")
-            count += 1
-        
-        logging.info(f"移动 \"{原始名称}\" 到 \"{新项目路径}\"...")
+        # 多个目录可能同时向同一目标移动，选好的名称先预留，移动完成后再释放
+        with 移动锁:
+            count = 1
+            while os.path.exists(新项目路径) or 新项目路径 in 已预留路径:
+                if os.path.isdir(项目路径):
+                    新项目路径 = os.path.join(目标路径, f"{项目名} ({count})")
+                else:
+                    文件名, 扩展名 = os.path.splitext(项目名)
+                    新项目路径 = os.path.join(目标路径, f"{文件名} ({count}){扩展名}")
+                count += 1
+            已预留路径.add(新项目路径)
+        计数("移动的项目")
+        计数("重名重试", count - 1)
+
+        # 逐项日志使用 % 参数，只有真正输出时才拼接消息
+        logging.info("移动 \"%s\" 到 \"%s\"...", 原始名称, 新项目路径, extra={"操作": "移动", "源": 项目路径, "目标": 新项目路径})
         try:
             shutil.move(项目路径, 新项目路径)
         except Exception as e:
             logging.error(f"移动文件失败：{str(e)}")
+        finally:
+            with 移动锁:
+                已预留路径.discard(新项目路径)
             
 # 函数：判断路径是否为符号链接
 def isLink(path):
@@ -173,77 +218,499 @@ def 处理文件夹目录(源目录, 文件夹类型, 目标文件夹路径, 版
     if os.path.exists(源文件夹路径): # 检查源文件夹是否存在
         if not isLink(源文件夹路径): # 如果源文件夹不是符号链接
         # if not os.path.islink(源文件夹路径): 
-            logging.info(f"正在移动 \"{源文件夹路径}\" 中的内容到 \"{目标文件夹路径}\"...")
+            logging.info("正在移动 \"%s\" 中的内容到 \"%s\"...", 源文件夹路径, 目标文件夹路径, extra={"操作": "合并", "源": 源文件夹路径, "目标": 目标文件夹路径})
             移动文件夹内容(源文件夹路径, 目标文件夹路径, 版本名字)
     else:
         logging.info(f"路径 \"{文件夹类型}\" 不存在，正在创建...")
     
     创建软链接(源文件夹路径, 目标文件夹路径)
 
-# 函数：添加待处理的目录到列表
-def 添加待处理的目录到列表():
-    """添加待处理的目录到列表"""
-    global 待处理的目录
-    
-    版本目录 = os.path.join(MC_根目录, "versions")
-    if os.path.exists(版本目录):
-        for entry in os.listdir(版本目录):
-            entry_path = os.path.join(版本目录, entry)
-            if os.path.isdir(entry_path):
-                版本名 = entry
-                mod文件夹路径 = os.path.join(entry_path, "mods")
-                if os.path.exists(mod文件夹路径):
-                    # 如果属于含mod但也处理的存档目录，则不跳过
-                    if 版本名 not in 含mod但也处理的存档目录:
-                        logging.info(f"该版本 {版本名} 存在mod文件夹，跳过文件夹处理")
-                        continue
-                待处理的目录.append(entry_path)
-    
-    if MC_根目录 != 官方MC_根目录:
-        待处理的目录.append(官方MC_根目录)
-        版本目录 = os.path.join(官方MC_根目录, "versions")
-        if os.path.exists(版本目录):
-            for entry in os.listdir(版本目录):
-                entry_path = os.path.join(版本目录, entry)
-                if os.path.isdir(entry_path):
-                    版本名 = entry
-                    mod文件夹路径 = os.path.join(entry_path, "mods")
-                    if os.path.exists(mod文件夹路径):
-                        # 如果属于含mod但也处理的存档目录，则不跳过
-                        if 版本名 not in 含mod但也处理的存档目录:
-                            logging.info(f"该版本 {版本名} 存在mod文件夹，跳过文件夹处理")
-                            continue
-                    待处理的目录.append(entry_path)
+# 函数：判断版本目录是否需要处理
+def 是否处理版本目录(版本路径):
+    """存在 mods 文件夹且不在 `含mod但也处理的存档目录` 中的版本不处理"""
+    版本名 = os.path.basename(版本路径)
+    mod文件夹路径 = os.path.join(版本路径, "mods")
+    if os.path.exists(mod文件夹路径):
+        # 如果属于含mod但也处理的存档目录，则不跳过
+        if 版本名 not in 含mod但也处理的存档目录:
+            logging.info(f"该版本 {版本名} 存在mod文件夹，跳过文件夹处理")
+            return False
+    return True
+
+# 函数：获取所有根目录
+def 获取根目录列表():
+    """主目录在前，其后是去重后的实例根目录"""
+    根目录列表 = [MC_根目录]
+    for 根目录 in 实例根目录:
+        if 根目录 and 根目录 not in 根目录列表:
+            根目录列表.append(根目录)
+    return 根目录列表
+
+# 函数：获取需要扫描的 versions 目录
+def 获取版本根目录列表():
+    """获取需要扫描的 versions 目录列表"""
+    return [os.path.join(根目录, "versions") for 根目录 in 获取根目录列表()]
+
+# 函数：加载配置文件
+def 加载配置(配置路径):
+    """从 JSON 配置文件读取根目录和文件夹类型，覆盖脚本中的默认值；文件不存在时使用默认值"""
+    global MC_根目录, 实例根目录, 含mod但也处理的存档目录, 要链接的文件夹, 最大线程数, 每个根目录并发数
+    if not os.path.exists(配置路径):
+        return
+    try:
+        配置 = 共享存档配置.读取配置(配置路径)
+    except ValueError as e:
+        logging.error(f"配置文件有误：{str(e)}")
+        sys.exit(1)
+    MC_根目录 = 配置["MC_根目录"]
+    实例根目录 = 配置["实例根目录"]
+    含mod但也处理的存档目录 = 配置["含mod但也处理的存档目录"]
+    要链接的文件夹 = 配置["要链接的文件夹"]
+    最大线程数 = 配置["最大线程数"]
+    每个根目录并发数 = 配置["每个根目录并发数"]
+    logging.info(f"已加载配置文件 \"{配置路径}\"，共 {len(获取根目录列表())} 个根目录")
+
+# 函数：加载目录状态
+def 加载状态():
+    """从状态文件加载上次运行时记录的目录状态"""
+    global 目录状态
+    try:
+        with open(状态文件路径, 'r', encoding='utf-8') as f:
+            目录状态 = json.load(f).get("目录", {})
+    except FileNotFoundError:
+        目录状态 = {}
+    except Exception as e:
+        logging.warning(f"状态文件读取失败，将完整扫描：{str(e)}")
+        目录状态 = {}
+
+# 函数：保存目录状态
+def 保存状态():
+    """先写临时文件再替换，避免中断时留下损坏的状态文件"""
+    os.makedirs(os.path.dirname(状态文件路径), exist_ok=True)
+    临时路径 = 状态文件路径 + ".tmp"
+    with open(临时路径, 'w', encoding='utf-8') as f:
+        json.dump({"目录": 目录状态}, f, ensure_ascii=False)
+    os.replace(临时路径, 状态文件路径)
+
+# 函数：读取目录标识
+def 读取目录标识(目录):
+    """目录的 mtime 和 inode；增删子项（包括链接被替换成文件夹）都会改变 mtime"""
+    状态 = os.stat(目录)
+    return [状态.st_mtime_ns, 状态.st_ino]
+
+# 函数：记录目录状态
+def 记录目录状态(目录, 含mod=False):
+    """记录目录标识和每个文件夹类型的链接状态"""
+    目录状态[目录] = {
+        "标识": 读取目录标识(目录),
+        "mods": 含mod,
+        "链接": {类型: isLink(os.path.join(目录, 类型)) for 类型 in 要链接的文件夹},
+    }
+
+# 函数：判断目录自上次运行后是否未变化
+def 目录未变化(目录, 标识):
+    """标识一致，且上次已全部链接（或因 mods 被跳过）时返回 True"""
+    上次 = 目录状态.get(目录)
+    if not 上次 or 上次["标识"] != 标识:
+        return False
+    if 上次["mods"]:
+        # 含mod但也处理的存档目录可能被修改过，需要重新判断
+        return os.path.basename(目录) not in 含mod但也处理的存档目录
+    return all(上次["链接"].get(类型) for 类型 in 要链接的文件夹)
+
+# 函数：发现某个根目录下待处理的目录
+@timed("发现待处理的目录")
+def 发现待处理的目录(根目录):
+    """返回 (待处理的目录列表, 未变化而跳过的目录数)
+
+    实例根目录本身也需要处理（主目录除外），且排在它的版本之前。
+    未变化的目录直接跳过，不再检查 mods 和每个文件夹类型。
+    """
+    候选目录 = []
+    if 根目录 != MC_根目录 and os.path.isdir(根目录):
+        候选目录.append((根目录, False))
+    版本目录 = os.path.join(根目录, "versions")
+    if os.path.isdir(版本目录):
+        with os.scandir(版本目录) as it:
+            候选目录.extend((entry.path, True) for entry in it if entry.is_dir())
+
+    待处理的目录 = []
+    跳过数 = 0
+    for 目录, 是版本目录 in 候选目录:
+        if not 全量扫描 and 目录未变化(目录, 读取目录标识(目录)):
+            跳过数 += 1
+        elif 是版本目录 and not 是否处理版本目录(目录):
+            记录目录状态(目录, 含mod=True)
+        else:
+            待处理的目录.append(目录)
+    return 待处理的目录, 跳过数
+
+# 函数：处理单个目录下的所有文件夹类型
+@timed("处理目录")
+def 处理目录(目录):
+    """将目录下的每个文件夹类型合并到主目录并链接"""
+    # 获取版本名称（如果是版本目录）
+    版本名字 = ""
+    if 目录 not in 获取根目录列表():
+        版本名字 = os.path.basename(目录)
+
+    # 版本目录名如 "1.21.10 原版"，对照表中没有的版本（快照、整合包等）数据包格式为 None；
+    # 数据包格式只写入日志（JSON 日志中可按 数据包格式 字段过滤），不影响是否处理和如何链接
+    数据包格式 = datapack_format(版本名字) if 版本名字 else None
+    if 数据包格式 is not None:
+        logging.info("正在处理目录 \"%s\"（数据包格式 %s）...", 目录, 数据包格式, extra={"操作": "处理", "版本": 版本名字, "数据包格式": 数据包格式})
+    else:
+        logging.info("正在处理目录 \"%s\"...", 目录, extra={"操作": "处理", "版本": 版本名字})
+
+    # 处理每个文件夹类型
+    for 文件夹类型 in 要链接的文件夹:
+        目标路径 = os.path.join(MC_根目录, 文件夹类型)
+        处理文件夹目录(目录, 文件夹类型, 目标路径, 版本名字)
+
+    # 处理完成后记录状态（链接会改变目录的 mtime，因此需要在处理之后读取）
+    记录目录状态(目录)
+
+# 函数：处理一个根目录
+async def 处理根目录(根目录, 执行器):
+    """在线程池中发现并处理一个根目录下的所有目录，同一根目录最多同时处理 `每个根目录并发数` 个目录"""
+    loop = asyncio.get_running_loop()
+    开始时间 = time.perf_counter()
+    结果 = {"根目录": 根目录, "处理": 0, "跳过": 0, "失败": 0}
+    try:
+        待处理的目录, 结果["跳过"] = await loop.run_in_executor(执行器, 发现待处理的目录, 根目录)
+    except OSError as e:
+        logging.error(f"扫描根目录 \"{根目录}\" 失败：{str(e)}")
+        结果["失败"] += 1
+        待处理的目录 = []
+
+    信号量 = asyncio.Semaphore(每个根目录并发数)
+
+    async def 处理一个目录(目录):
+        async with 信号量:
+            await loop.run_in_executor(执行器, 处理目录, 目录)
+
+    任务结果 = await asyncio.gather(*(处理一个目录(目录) for 目录 in 待处理的目录), return_exceptions=True)
+    for 目录, 任务 in zip(待处理的目录, 任务结果):
+        if isinstance(任务, Exception):
+            logging.error(f"处理目录 \"{目录}\" 时出错：{str(任务)}")
+            结果["失败"] += 1
+        else:
+            结果["处理"] += 1
+    结果["耗时"] = time.perf_counter() - 开始时间
+    return 结果
+
+# 函数：并发处理所有根目录
+async def 处理所有根目录():
+    """所有根目录并发处理，阻塞的文件系统操作放到有界线程池中执行"""
+    with ThreadPoolExecutor(max_workers=最大线程数, thread_name_prefix="版本隔离") as 执行器:
+        return await asyncio.gather(*(处理根目录(根目录, 执行器) for 根目录 in 获取根目录列表()))
 
 def main():
     """主函数"""
-    global 待处理的目录
-    
+    加载状态()
+
     # 为每个要链接的文件夹类型创建目标目录（如果不存在）
     for 文件夹类型 in 要链接的文件夹:
         目标路径 = os.path.join(MC_根目录, 文件夹类型)
         if not os.path.exists(目标路径):
             os.makedirs(目标路径, exist_ok=True)
-    
-    添加待处理的目录到列表()
-    
-    for 目录 in 待处理的目录:
-        logging.info(f"正在处理目录 \"{目录}\"...")
-        
-        # 获取版本名称（如果是版本目录）
-        版本名字 = ""
-        if 目录 != MC_根目录 and 目录 != 官方MC_根目录:
-            版本名字 = os.path.basename(目录)
-        
-        # 处理每个文件夹类型
-        for 文件夹类型 in 要链接的文件夹:
-            目标路径 = os.path.join(MC_根目录, 文件夹类型)
-            处理文件夹目录(目录, 文件夹类型, 目标路径, 版本名字)
+
+    开始时间 = time.perf_counter()
+    try:
+        with span("处理所有根目录"):
+            结果列表 = asyncio.run(处理所有根目录())
+    finally:
+        保存状态()
+
+    for 结果 in 结果列表:
+        logging.info(
+            f"根目录 \"{结果['根目录']}\"：处理 {结果['处理']} 个，跳过 {结果['跳过']} 个未变化的目录，"
+            f"失败 {结果['失败']} 个，耗时 {结果['耗时']:.2f} 秒"
+        )
+    logging.info(
+        f"共 {len(结果列表)} 个根目录：处理 {sum(r['处理'] for r in 结果列表)} 个目录，"
+        f"跳过 {sum(r['跳过'] for r in 结果列表)} 个未变化的目录，"
+        f"失败 {sum(r['失败'] for r in 结果列表)} 个，总耗时 {time.perf_counter() - 开始时间:.2f} 秒"
+    )
+
+    # 合并完成后增量更新共享文件夹索引
+    if 更新共享文件夹索引:
+        try:
+            with span("更新共享文件夹索引"):
+                共享文件夹索引.更新索引(MC_根目录, 要链接的文件夹, 线程数=最大线程数)
+        except Exception as e:
+            logging.warning(f"更新共享文件夹索引失败：{str(e)}")
+
+    # 对因 mods 被跳过的版本给出能否共享存档的结论
+    if 扫描跳过版本的模组:
+        版本根目录列表 = 获取版本根目录列表()
+        含mod的版本 = [
+            目录 for 目录, 状态 in 目录状态.items()
+            if 状态["mods"] and os.path.dirname(目录) in 版本根目录列表 and os.path.isdir(目录)
+            and os.path.basename(目录) not in 含mod但也处理的存档目录
+        ]
+        if 含mod的版本:
+            try:
+                with span("扫描模组"):
+                    扫描结果 = 模组元数据扫描.扫描版本(含mod的版本, 最大线程数)
+                模组元数据扫描.输出简要报告(扫描结果, 模组元数据扫描.分析冲突(扫描结果)[0])
+            except Exception as e:
+                logging.warning(f"扫描mod失败：{str(e)}")
+
+# ---------------------------------------------------------------------------
+# 常驻监视模式（--watch）
+# ---------------------------------------------------------------------------
+
+# inotify 事件掩码（见 <sys/inotify.h>）
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+class Inotify监视器:
+    """基于 ctypes 的 inotify 封装，仅在 Linux 上可用"""
+    事件头 = struct.Struct("iIII")
+
+    def __init__(self):
+        self.libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self.监视表 = {}  # wd -> 路径
+
+    def 添加(self, 路径, 掩码):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(路径), 掩码 | IN_ONLYDIR)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), 路径)
+        self.监视表[wd] = 路径
+        return wd
+
+    def 读取事件(self, 超时):
+        """等待最多 `超时` 秒，返回 [(所在目录, 掩码, 名称), ...]"""
+        可读, _, _ = select.select([self.fd], [], [], 超时)
+        if not 可读:
+            return []
+        try:
+            数据 = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        事件列表 = []
+        偏移 = 0
+        while 偏移 < len(数据):
+            wd, 掩码, _, 名称长度 = self.事件头.unpack_from(数据, 偏移)
+            偏移 += self.事件头.size
+            名称 = os.fsdecode(数据[偏移:偏移 + 名称长度].rstrip(b"\0"))
+            偏移 += 名称长度
+            if 掩码 & IN_IGNORED:
+                self.监视表.pop(wd, None)
+                continue
+            事件列表.append((self.监视表.get(wd), 掩码, 名称))
+        return 事件列表
+
+    def 关闭(self):
+        os.close(self.fd)
+
+def 处理变更的版本目录(版本路径):
+    """处理一个新建或发生变化的版本目录，自上次处理后没有变化的目录直接跳过"""
+    if not os.path.isdir(版本路径) or 目录未变化(版本路径, 读取目录标识(版本路径)):
+        return
+    if 是否处理版本目录(版本路径):
+        处理目录(版本路径)
+    else:
+        记录目录状态(版本路径, 含mod=True)
+    保存状态()
+
+def 是共享链接(路径, 名称):
+    """判断版本目录中的项是否是本脚本创建的、指向主目录同名文件夹的链接"""
+    if not isLink(路径):
+        return False
+    return os.path.realpath(路径) == os.path.realpath(os.path.join(MC_根目录, 名称))
+
+def 列出版本目录(版本目录):
+    """返回 versions 目录下各项的路径，读取失败（目录刚被删除、没有权限等）时记录警告并返回空列表"""
+    try:
+        return [os.path.join(版本目录, entry) for entry in os.listdir(版本目录)]
+    except OSError as e:
+        logging.warning(f"无法列出目录 \"{版本目录}\"：{str(e)}")
+        return []
+
+def 快照版本目录(版本根目录列表):
+    """轮询模式下记录每个版本目录的 (mtime, inode)"""
+    快照 = {}
+    for 版本目录 in 版本根目录列表:
+        try:
+            with os.scandir(版本目录) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir():
+                            状态 = entry.stat()
+                            快照[entry.path] = (状态.st_mtime_ns, 状态.st_ino)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return 快照
+
+def 监视版本目录(防抖秒数=2.0, 轮询间隔=2.0):
+    """常驻监视 versions 目录，新版本出现或版本目录变化时只处理该版本
+
+    Linux 上使用 inotify，空闲时阻塞在 select 上；其他平台退回到定时轮询。
+    同一版本目录在 `防抖秒数` 内没有新事件后才会被处理，避免启动器安装过程中反复处理。
+    """
+    版本根目录列表 = 获取版本根目录列表()
+    待处理 = {}  # 版本路径 -> 最后一次事件时间
+    关注的名称 = set(要链接的文件夹) | {"mods"}
+
+    监视器 = None
+    if platform.system() == "Linux":
+        try:
+            监视器 = Inotify监视器()
+        except (OSError, AttributeError) as e:
+            logging.warning(f"inotify 不可用，改用轮询：{str(e)}")
+
+    根目录掩码 = IN_CREATE | IN_MOVED_TO | IN_DELETE | IN_MOVED_FROM | IN_DELETE_SELF
+    版本掩码 = IN_CREATE | IN_MOVED_TO | IN_DELETE | IN_MOVED_FROM
+    版本根集合 = set()
+    # 被删除的 versions 目录，重新创建后恢复监视
+    丢失的版本根 = set()
+
+    def 开始监视版本根(版本目录):
+        监视器.添加(版本目录, 根目录掩码)
+        版本根集合.add(版本目录)
+        for entry_path in 列出版本目录(版本目录):
+            if os.path.isdir(entry_path):
+                try:
+                    监视器.添加(entry_path, 版本掩码)
+                except OSError as e:
+                    # 版本目录在列出后被删除或没有权限，跳过它，不影响其他版本
+                    logging.warning(f"无法监视目录 \"{entry_path}\"：{str(e)}")
+
+    if 监视器:
+        for 版本目录 in 版本根目录列表:
+            if not os.path.isdir(版本目录):
+                logging.warning(f"目录 \"{版本目录}\" 不存在，不监视")
+                continue
+            try:
+                开始监视版本根(版本目录)
+            except OSError as e:
+                logging.warning(f"无法监视目录 \"{版本目录}\"，重新创建后将继续监视：{str(e)}")
+                丢失的版本根.add(版本目录)
+        logging.info(f"正在通过 inotify 监视 {len(版本根集合)} 个 versions 目录，按 Ctrl+C 退出")
+    else:
+        上次快照 = 快照版本目录(版本根目录列表)
+        logging.info(f"正在每 {轮询间隔} 秒轮询 versions 目录，按 Ctrl+C 退出")
+
+    try:
+        while True:
+            现在 = time.monotonic()
+            if 待处理:
+                超时 = max(0.0, min(待处理.values()) + 防抖秒数 - 现在)
+            else:
+                超时 = None
+            if 丢失的版本根:
+                超时 = 轮询间隔 if 超时 is None else min(超时, 轮询间隔)
+
+            if 监视器:
+                for 所在目录, 掩码, 名称 in 监视器.读取事件(超时):
+                    if 掩码 & IN_Q_OVERFLOW:
+                        # 事件队列溢出，无法知道哪些版本变化了，全部重新检查
+                        for 版本目录 in 版本根集合:
+                            for 版本路径 in 列出版本目录(版本目录):
+                                待处理[版本路径] = time.monotonic()
+                        continue
+                    if 掩码 & IN_DELETE_SELF and 所在目录 in 版本根集合:
+                        # versions 目录本身被删除（或整个根目录被移走），inotify 随后会移除该监视
+                        版本根集合.discard(所在目录)
+                        丢失的版本根.add(所在目录)
+                        for 版本路径 in [路径 for 路径 in 待处理 if os.path.dirname(路径) == 所在目录]:
+                            del 待处理[版本路径]
+                        logging.warning(f"目录 \"{所在目录}\" 已被删除，重新创建后将继续监视")
+                        continue
+                    if 所在目录 is None or not 名称:
+                        continue
+                    if 所在目录 in 版本根集合:
+                        版本路径 = os.path.join(所在目录, 名称)
+                        if 掩码 & (IN_CREATE | IN_MOVED_TO) and 掩码 & IN_ISDIR:
+                            try:
+                                监视器.添加(版本路径, 版本掩码)
+                            except OSError:
+                                continue
+                            待处理[版本路径] = time.monotonic()
+                        elif 掩码 & (IN_DELETE | IN_MOVED_FROM):
+                            待处理.pop(版本路径, None)
+                    elif 名称 in 关注的名称:
+                        # 版本目录内新增/删除了 mods 或需要链接的文件夹；
+                        # 处理版本时本脚本创建的链接也会触发 IN_CREATE，忽略这些事件，避免同一版本被处理两次
+                        if 掩码 & IN_CREATE and 是共享链接(os.path.join(所在目录, 名称), 名称):
+                            continue
+                        待处理[所在目录] = time.monotonic()
+                for 版本目录 in list(丢失的版本根):
+                    if os.path.isdir(版本目录):
+                        try:
+                            开始监视版本根(版本目录)
+                        except OSError:
+                            continue
+                        丢失的版本根.discard(版本目录)
+                        logging.info(f"目录 \"{版本目录}\" 已重新创建，继续监视")
+                        for 版本路径 in 列出版本目录(版本目录):
+                            待处理[版本路径] = time.monotonic()
+            else:
+                time.sleep(轮询间隔 if 超时 is None else min(轮询间隔, 超时))
+                当前快照 = 快照版本目录(版本根目录列表)
+                for 版本路径, 状态 in 当前快照.items():
+                    if 上次快照.get(版本路径) != 状态:
+                        待处理[版本路径] = time.monotonic()
+                上次快照 = 当前快照
+
+            现在 = time.monotonic()
+            for 版本路径, 时间 in list(待处理.items()):
+                if 现在 - 时间 >= 防抖秒数:
+                    del 待处理[版本路径]
+                    # 与 处理根目录 相同：一个目录出错只记录错误，不能让常驻监视退出
+                    try:
+                        处理变更的版本目录(版本路径)
+                    except Exception as e:
+                        logging.error(f"处理目录 \"{版本路径}\" 时出错：{str(e)}")
+    finally:
+        if 监视器:
+            监视器.关闭()
+
+def 解析命令行参数():
+    """解析命令行参数"""
+    import argparse
+    parser = argparse.ArgumentParser(description='将 Minecraft 资源文件夹链接到各版本文件夹，在版本隔离中共享存档')
+    parser.add_argument('--config', '-c', default=配置文件路径, help='配置文件路径（默认为脚本目录下的 版本隔离配置.json）')
+    parser.add_argument('--full', '-f', action='store_true', help='忽略状态缓存，完整扫描所有版本目录')
+    parser.add_argument('--no-index', action='store_true', help='不更新共享文件夹索引')
+    parser.add_argument('--no-mod-scan', action='store_true', help='不扫描因 mods 被跳过的版本')
+    parser.add_argument('--watch', '-w', action='store_true', help='处理完成后常驻监视 versions 目录，自动处理新版本')
+    parser.add_argument('--debounce', type=float, default=2.0, help='监视模式下的防抖秒数（默认 2 秒）')
+    parser.add_argument('--interval', type=float, default=2.0, help='无 inotify 时的轮询间隔秒数（默认 2 秒）')
+    parser.add_argument('--profile', action='store_true', help='统计各阶段耗时，退出时输出汇总表')
+    parser.add_argument('--trace', metavar='文件', help='统计耗时并把每个区间写入 Chrome trace JSON 文件（隐含 --profile）')
+    return parser.parse_args()
 
 if __name__ == "__main__":
     try:
+        args = 解析命令行参数()
+        设置日志()
+        全量扫描 = args.full
+        更新共享文件夹索引 = not args.no_index
+        扫描跳过版本的模组 = not args.no_mod_scan
+        if args.profile or args.trace:
+            enable_metrics(trace_path=args.trace)
+        加载配置(args.config)
         main()
         logging.info("脚本执行完成！")
+        if args.watch:
+            监视版本目录(args.debounce, args.interval)
     except KeyboardInterrupt:
         logging.info("脚本被用户中断")
     except Exception as e:
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+1. 这是一个 Python 脚本，用于检查共享的 resourcepacks、shaderpacks 文件夹中每个包适用于哪些游戏版本。
+2. 为什么要编写此脚本
+   `点击在版本隔离中共享存档.py` 让所有版本共用同一个资源包和光影文件夹，里面混着各个版本的包，
+   以前只能进游戏看哪个包显示"不兼容"。
+3. 索引方式
+   - zip 包只读取中央目录和其中的 pack.mcmeta，不解压其他文件；文件夹形式的包直接读取 pack.mcmeta；
+   - 多个包在线程池中并行读取，结果按 大小 + 修改时间 缓存在 cache/资源包索引.json 中，未变化的包不再打开；
+     文件夹形式的包使用其中 pack.mcmeta 的大小和修改时间（直接编辑 pack.mcmeta 不会改变文件夹本身的修改时间）；
+   - 无法读取的项目（如指向已删除目标的符号链接）会被跳过；
+   - 包声明的格式（pack_format / supported_formats / min_format / max_format）与 lib/version_registry.json 的
+     resourcepack_formats 匹配，版本号的解析与共享存档脚本、数据包打包工具相同（"Fabric 1.20.1" 也能识别）。
+   - 没有 pack.mcmeta 的包（大部分光影包）视为没有声明版本，单独列出。
+4. 脚本使用方法
+   - python 资源包兼容索引.py                          按版本范围列出兼容的包
+   - python 资源包兼容索引.py --version 1.21.8         只列出适用于指定版本的包
+   - python 资源包兼容索引.py --output 兼容列表.json    同时把结果写入 JSON 文件
+
+@author Sakurakugu
+@date 2026-10-19
+"""
+
+import os
+import sys
+import json
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import 共享存档配置
+import logging
+from lib.version_registry import format_version, get_registry
+
+脚本目录 = os.path.dirname(os.path.abspath(__file__))
+缓存文件路径 = os.path.join(脚本目录, 'cache', '资源包索引.json')
+包文件夹类型 = ["resourcepacks", "shaderpacks"]
+# 只写主版本号的格式（如 "max_format": 70）包含该主版本下的所有次版本
+任意次版本 = 2 ** 31 - 1
+
+# 函数：转换格式为元组
+def 格式元组(值, 是上限=False):
+    """把 64、[69]、[69, 1] 等格式写法统一为 (主版本, 次版本)
+
+    只接受整数和 [主版本, 次版本] 数组；69.1 这样的小数无法区分 .1 和 .10，不是合法写法，抛出 ValueError。
+    """
+    if isinstance(值, list) and 1 <= len(值) <= 2 and all(isinstance(部分, int) for 部分 in 值):
+        return (值[0], 值[1] if len(值) > 1 else (任意次版本 if 是上限 else 0))
+    if isinstance(值, int) and not isinstance(值, bool):
+        return (值, 任意次版本 if 是上限 else 0)
+    raise ValueError(f"不支持的格式写法：{值!r}，应为整数或 [主版本, 次版本]")
+
+# 函数：解析 pack.mcmeta 声明的格式范围
+def 解析格式范围(pack):
+    """返回 ((最小主, 最小次), (最大主, 最大次))，没有声明时返回 None"""
+    if "min_format" in pack or "max_format" in pack:
+        最小 = pack.get("min_format", pack.get("max_format"))
+        最大 = pack.get("max_format", 最小)
+        return 格式元组(最小), 格式元组(最大, 是上限=True)
+    支持格式 = pack.get("supported_formats")
+    if isinstance(支持格式, dict):
+        return 格式元组(支持格式["min_inclusive"]), 格式元组(支持格式["max_inclusive"], 是上限=True)
+    if isinstance(支持格式, list) and len(支持格式) == 2:
+        return 格式元组(支持格式[0]), 格式元组(支持格式[1], 是上限=True)
+    if isinstance(支持格式, int):
+        return 格式元组(支持格式), 格式元组(支持格式, 是上限=True)
+    if "pack_format" in pack:
+        return 格式元组(pack["pack_format"]), 格式元组(pack["pack_format"], 是上限=True)
+    return None
+
+# 函数：读取单个包的信息
+def 读取包信息(路径, 是目录):
+    """读取 pack.mcmeta，返回缓存条目中除大小和修改时间外的部分"""
+    try:
+        if 是目录:
+            元数据路径 = os.path.join(路径, "pack.mcmeta")
+            if not os.path.exists(元数据路径):
+                return {"格式": None}
+            with open(元数据路径, 'rb') as f:
+                原始数据 = f.read()
+        else:
+            # ZipFile 只读取中央目录，read 只解压 pack.mcmeta 这一项
+            with zipfile.ZipFile(路径) as 压缩包:
+                try:
+                    原始数据 = 压缩包.read("pack.mcmeta")
+                except KeyError:
+                    return {"格式": None}
+        pack = json.loads(原始数据.decode("utf-8-sig")).get("pack", {})
+        范围 = 解析格式范围(pack)
+        描述 = pack.get("description", "")
+        return {
+            "格式": [list(范围[0]), list(范围[1])] if 范围 else None,
+            "描述": 描述 if isinstance(描述, str) else json.dumps(描述, ensure_ascii=False),
+        }
+    except Exception as e:
+        return {"格式": None, "错误": str(e)}
+
+# 函数：读取包的缓存标识
+def 读取包状态(entry, 是目录):
+    """zip 包使用自身的 stat；文件夹形式的包使用其中 pack.mcmeta 的 stat，没有 pack.mcmeta 时使用文件夹本身的"""
+    if 是目录:
+        try:
+            return os.stat(os.path.join(entry.path, "pack.mcmeta"))
+        except FileNotFoundError:
+            pass
+    return entry.stat()
+
+# 函数：加载版本表
+def 加载版本表(目标版本=None):
+    """返回 [(版本范围名, 最小格式, 最大格式), ...]；指定目标版本时只返回包含它的范围，没有或无法解析时返回空列表"""
+    范围表 = get_registry().resourcepack_formats
+    行列表 = list(范围表.rows())
+    if 目标版本:
+        序号 = 范围表.find(目标版本)
+        行列表 = [] if 序号 is None else [行列表[序号]]
+    版本表 = []
+    for 最小版本, 最大版本, 格式 in 行列表:
+        名称 = format_version(最小版本) if 最小版本 == 最大版本 else f"{format_version(最小版本)}-{format_version(最大版本)}"
+        # 游戏本身的格式是确定的一个值，只写主版本时即 主版本.0
+        游戏格式 = 格式元组(格式)
+        版本表.append((名称, 游戏格式, 游戏格式))
+    return 版本表
+
+# 函数：更新包索引
+def 更新包索引(MC_根目录, 线程数=16):
+    """扫描共享的包文件夹，大小和修改时间未变的包直接使用缓存
+
+    Returns:
+        dict: {路径: 条目}，条目包含 类型、名称、大小、mtime_ns、格式 等
+    """
+    try:
+        with open(缓存文件路径, 'r', encoding='utf-8') as f:
+            缓存 = json.load(f)
+    except (FileNotFoundError, ValueError):
+        缓存 = {}
+
+    索引 = {}
+    待读取 = []
+    for 类型 in 包文件夹类型:
+        文件夹路径 = os.path.join(MC_根目录, 类型)
+        if not os.path.isdir(文件夹路径):
+            continue
+        with os.scandir(文件夹路径) as it:
+            for entry in it:
+                是目录 = entry.is_dir()
+                if not 是目录 and not entry.name.lower().endswith(".zip"):
+                    continue
+                try:
+                    状态 = 读取包状态(entry, 是目录)
+                except OSError as e:
+                    logging.warning(f"无法读取 \"{entry.path}\"，已跳过：{str(e)}")
+                    continue
+                条目 = 缓存.get(entry.path)
+                if 条目 and 条目["大小"] == 状态.st_size and 条目["mtime_ns"] == 状态.st_mtime_ns:
+                    索引[entry.path] = 条目
+                    continue
+                条目 = {"类型": 类型, "名称": entry.name, "大小": 状态.st_size, "mtime_ns": 状态.st_mtime_ns}
+                索引[entry.path] = 条目
+                待读取.append((entry.path, 是目录, 条目))
+
+    with ThreadPoolExecutor(max_workers=线程数) as 执行器:
+        for (路径, 是目录, 条目), 信息 in zip(待读取, 执行器.map(lambda 项: 读取包信息(项[0], 项[1]), 待读取)):
+            条目.update(信息)
+            if "错误" in 信息:
+                logging.warning(f"读取 \"{路径}\" 的 pack.mcmeta 失败：{信息['错误']}")
+
+    os.makedirs(os.path.dirname(缓存文件路径), exist_ok=True)
+    with open(缓存文件路径, 'w', encoding='utf-8') as f:
+        json.dump(索引, f, ensure_ascii=False)
+    logging.info(f"共 {len(索引)} 个包，重新读取 {len(待读取)} 个，其余使用缓存")
+    return 索引
+
+# 函数：按版本范围匹配兼容的包
+def 匹配兼容包(索引, 版本表):
+    """返回 ({版本范围名: [包名称, ...]}, [未声明格式的包名称, ...], [读取失败的包名称, ...])"""
+    兼容列表 = {名称: [] for 名称, *_ in 版本表}
+    未声明 = []
+    读取失败 = []
+    for 条目 in sorted(索引.values(), key=lambda 条目: (条目["类型"], 条目["名称"])):
+        显示名称 = f"{条目['类型']}/{条目['名称']}"
+        if "错误" in 条目:
+            读取失败.append(显示名称)
+            continue
+        if not 条目.get("格式"):
+            未声明.append(显示名称)
+            continue
+        包最小, 包最大 = (tuple(值) for 值 in 条目["格式"])
+        for 名称, 最小格式, 最大格式 in 版本表:
+            if 包最小 <= 最大格式 and 包最大 >= 最小格式:
+                兼容列表[名称].append(显示名称)
+    return 兼容列表, 未声明, 读取失败
+
+def main():
+    """主函数"""
+    import argparse
+
+    共享存档配置.设置日志('资源包兼容索引.log')
+    parser = argparse.ArgumentParser(description='共享资源包和光影包兼容性索引')
+    parser.add_argument('--config', '-c', default=共享存档配置.配置文件路径, help='配置文件路径（默认为脚本目录下的 版本隔离配置.json）')
+    parser.add_argument('--root', help='主目录（默认读取配置文件中的 MC_根目录）')
+    parser.add_argument('--version', '-v', help='只列出适用于指定游戏版本的包，如 1.21.8')
+    parser.add_argument('--output', '-o', help='把按版本范围分组的兼容列表写入 JSON 文件')
+    parser.add_argument('--threads', type=int, default=16, help='并行读取的线程数')
+    args = parser.parse_args()
+    args.root = args.root or 共享存档配置.读取配置(args.config)["MC_根目录"]
+
+    if args.version:
+        版本表 = 加载版本表(args.version)
+        if not 版本表:
+            logging.error(f"lib/version_registry.json 中没有包含版本 {args.version} 的资源包格式")
+            return
+    else:
+        版本表 = 加载版本表()
+
+    兼容列表, 未声明, 读取失败 = 匹配兼容包(更新包索引(args.root, args.threads), 版本表)
+    for 名称, 包列表 in 兼容列表.items():
+        logging.info(f"{名称}：{len(包列表)} 个兼容的包")
+        for 包名称 in 包列表:
+            logging.info(f"  {包名称}")
+    if 未声明:
+        logging.info(f"未声明格式（通常是光影包，适用于所有版本）：{len(未声明)} 个")
+        for 包名称 in 未声明:
+            logging.info(f"  {包名称}")
+    if 读取失败:
+        logging.warning(f"pack.mcmeta 读取失败：{', '.join(读取失败)}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"versions": 兼容列表, "undeclared": 未声明, "unreadable": 读取失败}, f, ensure_ascii=False, indent=2)
+        logging.info(f"输出路径: {os.path.abspath(args.output)}")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        logging.info("脚本被用户中断")
+    except Exception as e:
+        logging.error(f"脚本执行时出现错误：{str(e)}")
+        import traceback
+        logging.error(traceback.format_exc())
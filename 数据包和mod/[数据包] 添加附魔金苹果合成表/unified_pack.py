@@ -5,12 +5,26 @@
 """
 
 import os
+import sys
 import json
 import shutil
 import zipfile
 from pathlib import Path
 from datetime import datetime
-from packaging import version
+
+# 版本对照表和性能统计使用仓库根目录的 lib/，性能统计在单独复制本目录时退化为空操作
+_repo_root = str(Path(__file__).resolve().parents[2])
+if _repo_root not in sys.path:
+    sys.path.insert(0, _repo_root)
+from lib.version_registry import RangeTable, feature, parse_version
+try:
+    from lib.log import enable_metrics, timed
+except ImportError:
+    def enable_metrics(enabled=True, trace_path=None, trace_limit=None):
+        print("未找到 lib/log.py，无法启用性能统计")
+
+    def timed(name=None):
+        return lambda func: func
 
 class UnifiedDatapackBuilder:
     def __init__(self, base_dir=None):
@@ -35,6 +49,13 @@ class UnifiedDatapackBuilder:
         
         with open(self.versions_file, 'r', encoding='utf-8') as f:
             self.versions_config = json.load(f)
+        
+        # 按 version_range 查找配置时二分查找，不再逐个比较
+        self.version_table = RangeTable(
+            (config['version_range'][0], config['version_range'][1], key)
+            for key, config in self.versions_config['versions'].items()
+            if len(config.get('version_range', [])) == 2
+        )
     
     def load_config(self):
         """加载打包配置"""
@@ -69,19 +90,12 @@ class UnifiedDatapackBuilder:
                   0 如果 version_str1 == version_str2
                   1 如果 version_str1 > version_str2
         """
-        try:
-            v1 = version.parse(version_str1)
-            v2 = version.parse(version_str2)
-            
-            if v1 < v2:
-                return -1
-            elif v1 > v2:
-                return 1
-            else:
-                return 0
-        except Exception as e:
-            print(f"版本比较错误: {e}")
+        v1 = parse_version(version_str1)
+        v2 = parse_version(version_str2)
+        if v1 is None or v2 is None:
+            print(f"版本比较错误: 无法解析的版本号 {version_str1 if v1 is None else version_str2}")
             return 0
+        return (v1 > v2) - (v1 < v2)
     
     def should_use_new_format(self, target_version):
         """判断指定版本是否应该使用新格式 (min_format/max_format)
@@ -92,9 +106,8 @@ class UnifiedDatapackBuilder:
         Returns:
             bool: True 如果应该使用新格式，False 如果使用旧格式
         """
-        # 版本检测配置：版本号大于此版本使用 min_format/max_format，小于等于此版本使用 supported_formats
-        format_transition_version = "1.21.8"
-        return self.compare_version(target_version, format_transition_version) > 0
+        # 分界版本见 lib/version_registry.json：1.21.9 起使用 min_format/max_format，之前使用 supported_formats
+        return feature("pack_format_fields", target_version) == "min_max_format"
     
     def get_result_key_for_version(self, target_version):
         """根据版本自动检测result_key
@@ -105,11 +118,7 @@ class UnifiedDatapackBuilder:
         Returns:
             str: "item" 如果版本 <= 1.20.4，"id" 如果版本 > 1.20.4
         """
-        transition_version = "1.20.4"
-        if self.compare_version(target_version, transition_version) <= 0:
-            return "item"
-        else:
-            return "id"
+        return feature("recipe_result_key", target_version)
     
     def get_recipe_folder_for_version(self, target_version):
         """根据版本自动检测recipe_folder
@@ -120,11 +129,7 @@ class UnifiedDatapackBuilder:
         Returns:
             str: "recipes" 如果版本 < 1.21.0，"recipe" 如果版本 >= 1.21.0
         """
-        transition_version = "1.21.0"
-        if self.compare_version(target_version, transition_version) < 0:
-            return "recipes"
-        else:
-            return "recipe"
+        return feature("recipe_folder", target_version)
     
     def get_recipe_format_for_version(self, target_version):
         """根据版本自动检测recipe_format
@@ -135,15 +140,8 @@ class UnifiedDatapackBuilder:
         Returns:
             str: "legacy", "modern", 或 "simplified"
         """
-        # 1.20.4及以下：legacy
-        if self.compare_version(target_version, "1.20.4") <= 0:
-            return "legacy"
-        # 1.21.2及以上：simplified
-        elif self.compare_version(target_version, "1.21.2") >= 0:
-            return "simplified"
-        # 1.20.5-1.21.1：modern
-        else:
-            return "modern"
+        # 1.20.4及以下：legacy；1.20.5-1.21.1：modern；1.21.2及以上：simplified
+        return feature("recipe_format", target_version)
     
     def get_advancement_format_for_version(self, target_version):
         """根据版本自动检测advancement格式
@@ -154,10 +152,7 @@ class UnifiedDatapackBuilder:
         Returns:
             str: "legacy" 如果版本 <= 1.20.4，"modern" 如果版本 > 1.20.4
         """
-        if self.compare_version(target_version, "1.20.4") <= 0:
-            return "legacy"
-        else:
-            return "modern"
+        return feature("advancement_format", target_version)
     
     def convert_advancement_format(self, advancement_data, target_format):
         """转换advancement文件格式
@@ -228,17 +223,10 @@ class UnifiedDatapackBuilder:
         Returns:
             tuple: (version_key, version_config) 或 (None, None) 如果未找到
         """
-        versions = self.versions_config['versions']
-        
-        for version_key, version_config in versions.items():
-            version_range = version_config.get('version_range')
-            if version_range and len(version_range) == 2:
-                min_version, max_version = version_range
-                if (self.compare_version(target_version, min_version) >= 0 and 
-                    self.compare_version(target_version, max_version) <= 0):
-                    return version_key, version_config
-        
-        return None, None
+        version_key = self.version_table.lookup(target_version)
+        if version_key is None:
+            return None, None
+        return version_key, self.versions_config['versions'][version_key]
     
     def convert_datapack_range(self, datapack_range, use_new_format):
         """
@@ -302,6 +290,7 @@ class UnifiedDatapackBuilder:
         
         return pack_data
     
+    @timed()
     def generate_recipe_file(self, target_version):
         """生成合成表文件内容"""
         # 从src目录读取基础模板
@@ -358,6 +347,7 @@ class UnifiedDatapackBuilder:
         
         return recipe
     
+    @timed()
     def copy_advancement_files(self, build_version_dir, target_version):
         """复制并转换进度文件格式
         
@@ -409,6 +399,7 @@ class UnifiedDatapackBuilder:
                     # 非JSON文件直接复制
                     shutil.copy2(src_file, dest_file)
     
+    @timed()
     def build_version(self, version_key, version_config):
         """构建单个版本的数据包"""
         print(f"\\n正在构建版本: {version_key}")
@@ -457,6 +448,7 @@ class UnifiedDatapackBuilder:
             print(f"  ✗ 构建失败: {e}")
             return None
     
+    @timed()
     def create_zip(self, source_folder, output_path):
         """创建zip文件"""
         compression = getattr(zipfile, self.config["zip_compression"], zipfile.ZIP_DEFLATED)
@@ -472,6 +464,7 @@ class UnifiedDatapackBuilder:
         
         return True
     
+    @timed()
     def build_for_target_version(self, target_version, create_zip=True):
         """根据目标版本号构建数据包
         
@@ -574,6 +567,7 @@ class UnifiedDatapackBuilder:
         
         return f"{base_name}.zip"
     
+    @timed()
     def build_all_versions(self, create_zips=True):
         """构建所有版本"""
         # 清理构建目录
@@ -692,8 +686,12 @@ def main():
     parser.add_argument('--no-zip', action='store_true', help='不创建zip文件，只构建文件夹')
     parser.add_argument('--list', '-l', action='store_true', help='列出所有可用版本')
     parser.add_argument('--clean', '-c', action='store_true', help='清理构建目录后退出')
+    parser.add_argument('--profile', action='store_true', help='统计各构建步骤的耗时，退出时输出汇总表')
+    parser.add_argument('--trace', metavar='文件', help='把各构建步骤的耗时写入 Chrome trace 文件（隐含 --profile）')
     
     args = parser.parse_args()
+    if args.profile or args.trace:
+        enable_metrics(trace_path=args.trace)
     
     try:
         builder = UnifiedDatapackBuilder()